@@ -11,6 +11,10 @@ import { PORT } from './config';
 
 const app: express.Application = express();
 
+// Every response is a small JSON body from a local database and clients never send conditional requests,
+// so skip hashing each body into an ETag
+app.set('etag', false);
+
 // Middleware
 app.use(cors({
   origin: process.env.NODE_ENV === 'production'
@@ -0,0 +1,48 @@
+import BetterSqlite3 from 'better-sqlite3';
+
+/**
+ * Open a SQLite connection with the settings shared by the system and user databases.
+ */
+export function openConnection(dbPath: string): BetterSqlite3.Database {
+  const db = new BetterSqlite3(dbPath);
+  db.pragma('foreign_keys = ON');
+  // WAL syncs only at checkpoints under synchronous=NORMAL, and readers no longer block the writer
+  db.pragma('journal_mode = WAL');
+  db.pragma('synchronous = NORMAL');
+  return db;
+}
+
+/**
+ * Files WAL mode keeps next to a database while it is open, or after a crash before the last checkpoint.
+ * They hold committed data, so they must move and be removed together with the database file.
+ */
+export const WAL_SIDECAR_SUFFIXES = ['-wal', '-shm'];
+
+/**
+ * Prepared statements for one connection, keyed by their SQL, so each query is compiled once.
+ */
+export class StatementCache {
+  private statements: Map<string, BetterSqlite3.Statement> = new Map();
+
+  constructor(private db: BetterSqlite3.Database) {}
+
+  /**
+   * Get the prepared statement for a query, compiling it on first use.
+   */
+  prepare(sql: string): BetterSqlite3.Statement {
+    let stmt = this.statements.get(sql);
+    if (!stmt) {
+      stmt = this.db.prepare(sql);
+      this.statements.set(sql, stmt);
+    }
+    return stmt;
+  }
+
+  get size(): number {
+    return this.statements.size;
+  }
+
+  clear(): void {
+    this.statements.clear();
+  }
+}
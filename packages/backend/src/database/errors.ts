@@ -44,3 +44,9 @@ export class UserDatabaseAlreadyExistsError extends OutlinerDBError {
     super(message);
   }
 }
+
+export class UserDatabaseBusyError extends OutlinerDBError {
+  constructor(message: string = "User database is busy") {
+    super(message);
+  }
+}
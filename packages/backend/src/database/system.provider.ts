@@ -1,7 +1,7 @@
 import { Request, Response, NextFunction } from 'express';
 import { SystemDatabase } from './system';
 import { UserDatabase } from './user';
-import { UserDatabaseNotFoundError } from './errors';
+import { UserDatabaseNotFoundError, UserDatabaseBusyError } from './errors';
 import { SYSTEM_DB_PATH } from '../config';
 
 /**
@@ -17,7 +17,26 @@ export class SystemDatabaseProvider {
     return SystemDatabaseProvider.instance;
   }
 
+  /**
+   * Serve the given system database from getInstance() until the returned function is called,
+   * which puts the previous instance back. Lets tests hand their database to the routes directly
+   * instead of pointing SYSTEM_DB_PATH at it and reopening the file.
+   */
+  static useInstance(sysDb: SystemDatabase): () => void {
+    const previous = SystemDatabaseProvider.instance;
+    UserDatabaseProvider.closeAllInstances();
+    SystemDatabaseProvider.instance = sysDb;
+
+    return () => {
+      UserDatabaseProvider.closeAllInstances();
+      SystemDatabaseProvider.instance = previous;
+    };
+  }
+
   static closeInstance(): void {
+    // User database ids are only meaningful for the system database that issued them
+    UserDatabaseProvider.closeAllInstances();
+
     if (SystemDatabaseProvider.instance) {
       SystemDatabaseProvider.instance.close();
       SystemDatabaseProvider.instance = null;
@@ -25,6 +44,70 @@ export class SystemDatabaseProvider {
   }
 }
 
+/**
+ * Keeps one open user database connection per database id, so requests reuse it
+ * instead of reopening the file and re-running table setup on every request.
+ */
+export class UserDatabaseProvider {
+  private static instances: Map<string, UserDatabase> = new Map();
+  // Ids whose database file is being renamed or deleted, with the number of such operations in flight
+  private static fileOperations: Map<string, number> = new Map();
+
+  static getInstance(db_id: string): UserDatabase {
+    // Opening the file mid-rename or mid-delete would create an empty database at the new path
+    // (or recreate the old one) and cache a connection that the file operation then orphans
+    if (UserDatabaseProvider.fileOperations.has(db_id)) {
+      throw new UserDatabaseBusyError(`Database with id '${db_id}' is being renamed or deleted.`);
+    }
+
+    let userDb = UserDatabaseProvider.instances.get(db_id);
+    if (!userDb) {
+      const dbInfo = SystemDatabaseProvider.getInstance().getUserDatabaseById(db_id);
+      userDb = new UserDatabase(dbInfo.path);
+      UserDatabaseProvider.instances.set(db_id, userDb);
+    }
+    return userDb;
+  }
+
+  /**
+   * Close the cached connection for a database, e.g. before its file is renamed or deleted.
+   */
+  static closeInstance(db_id: string): void {
+    const userDb = UserDatabaseProvider.instances.get(db_id);
+    if (userDb) {
+      userDb.close();
+      UserDatabaseProvider.instances.delete(db_id);
+    }
+  }
+
+  /**
+   * Run an operation that renames or deletes a database's file. The cached connection is closed first,
+   * and no new one is opened for that id until the operation has finished.
+   */
+  static async runFileOperation<T>(db_id: string, operation: () => Promise<T>): Promise<T> {
+    const operations = UserDatabaseProvider.fileOperations;
+    UserDatabaseProvider.closeInstance(db_id);
+    operations.set(db_id, (operations.get(db_id) ?? 0) + 1);
+    try {
+      return await operation();
+    } finally {
+      const remaining = operations.get(db_id)! - 1;
+      if (remaining === 0) {
+        operations.delete(db_id);
+      } else {
+        operations.set(db_id, remaining);
+      }
+    }
+  }
+
+  static closeAllInstances(): void {
+    for (const userDb of UserDatabaseProvider.instances.values()) {
+      userDb.close();
+    }
+    UserDatabaseProvider.instances.clear();
+  }
+}
+
 /**
  * Middleware to provide system database dependency to routes.
  */
@@ -36,15 +119,13 @@ export const injectSystemDatabase = (req: Request, res: Response, next: NextFunc
 
 /**
  * Middleware helper to get a user database instance based on the db_id parameter.
+ * The instance is shared between requests and must not be closed by the caller.
  */
-export const getUserDatabase = (db_id: string) => {
-  const sysDb = SystemDatabaseProvider.getInstance();
-
+export const getUserDatabase = (db_id: string): UserDatabase => {
   try {
-    const dbInfo = sysDb.getUserDatabaseById(db_id);
-    return new UserDatabase(dbInfo.path);
+    return UserDatabaseProvider.getInstance(db_id);
   } catch (error) {
-    if (error instanceof UserDatabaseNotFoundError) {
+    if (error instanceof UserDatabaseNotFoundError || error instanceof UserDatabaseBusyError) {
       throw error;
     }
     throw new UserDatabaseNotFoundError(`Database with id '${db_id}' not found. Please create it first.`);
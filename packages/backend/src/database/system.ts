@@ -1,6 +1,7 @@
 import BetterSqlite3 from 'better-sqlite3';
+import { openConnection, StatementCache, WAL_SIDECAR_SUFFIXES } from './connection';
 import * as path from 'path';
-import { promises as fsPromises } from 'fs';
+import { mkdirSync, promises as fsPromises } from 'fs';
 import { ISystemDatabase } from './interfaces';
 import { SYSTEM_DB_NAME, SYSTEM_DB_PATH } from '../config';
 import { UserDatabaseAlreadyExistsError, UserDatabaseNotFoundError } from './errors';
@@ -17,6 +18,7 @@ import {
  */
 export class SystemDatabase implements ISystemDatabase {
   private db: BetterSqlite3.Database;
+  private statements: StatementCache;
   private readonly TABLE_NAME = 'user_databases';
   databasesDir: string;
 
@@ -26,11 +28,11 @@ export class SystemDatabase implements ISystemDatabase {
 
     // Create the databases directory synchronously if it doesn't exist
     // Better to use synchronous fs call in constructor
-    require('fs').mkdirSync(this.databasesDir, { recursive: true });
+    mkdirSync(this.databasesDir, { recursive: true });
     let resolvedDbPath = path.join(this.databasesDir, SYSTEM_DB_NAME());
 
-    this.db = new BetterSqlite3(resolvedDbPath);
-    this.db.pragma('foreign_keys = ON');
+    this.db = openConnection(resolvedDbPath);
+    this.statements = new StatementCache(this.db);
     this.initializeTables();
   }
 
@@ -52,7 +54,7 @@ export class SystemDatabase implements ISystemDatabase {
    * Get all user databases from the system database
    */
   getAllUserDatabases(): UserDatabaseInfo[] {
-    const stmt = this.db.prepare(`
+    const stmt = this.statements.prepare(`
       SELECT id, name, path, created_at
       FROM ${this.TABLE_NAME}
       ORDER BY created_at DESC
@@ -67,7 +69,7 @@ export class SystemDatabase implements ISystemDatabase {
    * Get a specific user database by ID
    */
   getUserDatabaseById(id: string): UserDatabaseInfo {
-    const stmt = this.db.prepare(`
+    const stmt = this.statements.prepare(`
       SELECT id, name, path, created_at
       FROM ${this.TABLE_NAME}
       WHERE id = ?
@@ -85,7 +87,7 @@ export class SystemDatabase implements ISystemDatabase {
    * Get a specific user database by name
    */
   getUserDatabaseByName(name: string): UserDatabaseInfo {
-    const stmt = this.db.prepare(`
+    const stmt = this.statements.prepare(`
       SELECT id, name, path, created_at
       FROM ${this.TABLE_NAME}
       WHERE name = ?
@@ -103,7 +105,7 @@ export class SystemDatabase implements ISystemDatabase {
    * Get a specific user database by path
    */
   getUserDatabaseByPath(path: string): UserDatabaseInfo {
-    const stmt = this.db.prepare(`
+    const stmt = this.statements.prepare(`
       SELECT id, name, path, created_at
       FROM ${this.TABLE_NAME}
       WHERE path = ?
@@ -127,7 +129,7 @@ export class SystemDatabase implements ISystemDatabase {
       dbPath = this.sanitizePath(dbPath); // Sanitize to prevent directory traversal
       const fullDbPath = path.join(this.databasesDir, dbPath);
 
-      const stmt = this.db.prepare(`
+      const stmt = this.statements.prepare(`
         INSERT INTO ${this.TABLE_NAME} (name, path)
         VALUES (?, ?)
       `);
@@ -136,7 +138,7 @@ export class SystemDatabase implements ISystemDatabase {
       stmt.run(name, fullDbPath);
 
       // Get the inserted record to return all fields
-      const selectStmt = this.db.prepare(`
+      const selectStmt = this.statements.prepare(`
         SELECT id, name, path, created_at
         FROM ${this.TABLE_NAME}
         WHERE name = ?
@@ -209,7 +211,7 @@ export class SystemDatabase implements ISystemDatabase {
 
     // Update both name and path in the database
     try {
-      const stmt = this.db.prepare(
+      const stmt = this.statements.prepare(
         `UPDATE ${this.TABLE_NAME} SET name = ?, path = ? WHERE id = ?`
       );
       const result = stmt.run(newName, newDbEntryFullPath, id);
@@ -226,6 +228,9 @@ export class SystemDatabase implements ISystemDatabase {
       try {
         await fsPromises.access(oldFileSystemPath);
         await fsPromises.rename(oldFileSystemPath, newFileSystemPath);
+        for (const suffix of WAL_SIDECAR_SUFFIXES) {
+          await this.ignoreMissingFile(fsPromises.rename(oldFileSystemPath + suffix, newFileSystemPath + suffix));
+        }
       } catch (error) {
         // If old file doesn't exist, it might be a new path for a moved/external file
         // Or it's an error. For now, just continue.
@@ -266,7 +271,11 @@ export class SystemDatabase implements ISystemDatabase {
       }
     }
 
-    const stmt = this.db.prepare(`
+    for (const suffix of WAL_SIDECAR_SUFFIXES) {
+      await this.ignoreMissingFile(fsPromises.unlink(dbFilePath + suffix));
+    }
+
+    const stmt = this.statements.prepare(`
       DELETE FROM ${this.TABLE_NAME}
       WHERE id = ?
     `);
@@ -280,10 +289,24 @@ export class SystemDatabase implements ISystemDatabase {
     return result.changes > 0;
   }
 
+  /**
+   * Await a file operation, treating a missing file as nothing to do
+   */
+  private async ignoreMissingFile(operation: Promise<void>): Promise<void> {
+    try {
+      await operation;
+    } catch (error) {
+      if ((error as NodeJS.ErrnoException).code !== 'ENOENT') {
+        throw error;
+      }
+    }
+  }
+
   /**
    * Close the database connection
    */
   close(): void {
+    this.statements.clear();
     this.db.close();
   }
 }
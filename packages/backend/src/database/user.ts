@@ -1,4 +1,5 @@
 import BetterSqlite3 from 'better-sqlite3';
+import { openConnection, StatementCache } from './connection';
 import {
   IUserDatabase,
   IDatabaseConnection
@@ -21,160 +22,166 @@ import {
   PageAlreadyExistsError
 } from './errors';
 
+/**
+ * Version of USER_SCHEMA_SQL, stored in the database's user_version once the schema has been applied.
+ * Bump it whenever the schema changes.
+ */
+export const USER_SCHEMA_VERSION = 2;
+
+/**
+ * DDL for a user database (matching Python implementation).
+ * Every statement is idempotent, so it is safe to run against an existing database.
+ */
+const USER_SCHEMA_SQL = `
+  CREATE TABLE IF NOT EXISTS workspaces (
+    workspace_id INTEGER PRIMARY KEY,
+    name VARCHAR(255),
+    color BLOB(3) NOT NULL
+  );
+
+  CREATE TABLE IF NOT EXISTS pages (
+    page_id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+    title VARCHAR(255) NOT NULL UNIQUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+  );
+
+  -- FTS5 virtual table for full-text search of pages.
+  -- Escaped searches match every token as a prefix, so short prefixes get their own index.
+  CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+    title,
+    page_id UNINDEXED,
+    content='pages',
+    prefix='2 3'
+  );
+
+  CREATE TABLE IF NOT EXISTS blocks (
+    block_id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
+    content TEXT NOT NULL,
+    page_id TEXT NULL,
+    parent_block_id TEXT NULL,
+    position INTEGER NOT NULL,
+    type TEXT NOT NULL DEFAULT 'text',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (page_id) REFERENCES pages(page_id) ON DELETE CASCADE,
+    FOREIGN KEY (parent_block_id) REFERENCES blocks(block_id) ON DELETE CASCADE,
+    CHECK (
+      (page_id IS NOT NULL AND parent_block_id IS NULL)
+      OR
+      (page_id IS NULL AND parent_block_id IS NOT NULL)
+    )
+  );
+
+  -- FTS5 virtual table for full-text search of blocks
+  CREATE VIRTUAL TABLE IF NOT EXISTS blocks_fts USING fts5(
+    content,
+    block_id UNINDEXED,
+    page_id UNINDEXED,
+    parent_block_id UNINDEXED,
+    type UNINDEXED,
+    content='blocks',
+    prefix='2 3'
+  );
+
+  -- Triggers to keep the FTS tables synchronized with the main tables
+  CREATE TRIGGER IF NOT EXISTS pages_ai AFTER INSERT ON pages
+  BEGIN
+    INSERT INTO pages_fts (rowid, title, page_id) VALUES (NEW.rowid, NEW.title, NEW.page_id);
+  END;
+
+  CREATE TRIGGER IF NOT EXISTS pages_ad AFTER DELETE ON pages
+  BEGIN
+    INSERT INTO pages_fts(pages_fts, rowid, title) VALUES('delete', OLD.rowid, OLD.title);
+  END;
+
+  CREATE TRIGGER IF NOT EXISTS pages_au AFTER UPDATE ON pages
+  BEGIN
+    INSERT INTO pages_fts(pages_fts, rowid, title) VALUES('delete', OLD.rowid, OLD.title);
+    INSERT INTO pages_fts(rowid, title, page_id) VALUES (NEW.rowid, NEW.title, NEW.page_id);
+  END;
+
+  CREATE TRIGGER IF NOT EXISTS blocks_ai AFTER INSERT ON blocks
+  BEGIN
+    INSERT INTO blocks_fts (rowid, content, block_id, page_id, parent_block_id, type)
+    VALUES (NEW.rowid, NEW.content, NEW.block_id, NEW.page_id, NEW.parent_block_id, NEW.type);
+  END;
+
+  CREATE TRIGGER IF NOT EXISTS blocks_ad AFTER DELETE ON blocks
+  BEGIN
+    INSERT INTO blocks_fts(blocks_fts, rowid, content) VALUES('delete', OLD.rowid, OLD.content);
+  END;
+
+  CREATE TRIGGER IF NOT EXISTS blocks_au AFTER UPDATE ON blocks
+  BEGIN
+    INSERT INTO blocks_fts(blocks_fts, rowid, content) VALUES('delete', OLD.rowid, OLD.content);
+    INSERT INTO blocks_fts (rowid, content, block_id, page_id, parent_block_id, type)
+    VALUES (NEW.rowid, NEW.content, NEW.block_id, NEW.page_id, NEW.parent_block_id, NEW.type);
+  END;
+
+  -- Default workspace, created once with ID 0
+  INSERT OR IGNORE INTO workspaces (workspace_id, name, color) VALUES (0, 'Default', X'4285F4');
+`;
+
+/**
+ * Drops the FTS tables so USER_SCHEMA_SQL recreates them with the current options;
+ * CREATE VIRTUAL TABLE IF NOT EXISTS would otherwise keep an older definition.
+ */
+const DROP_FTS_SQL = `
+  DROP TABLE IF EXISTS pages_fts;
+  DROP TABLE IF EXISTS blocks_fts;
+`;
+
 /**
  * UserDatabase handles operations for a specific user's data.
  * It stores pages, blocks, and workspaces for a single user.
  */
 export class UserDatabase implements IUserDatabase {
   private db: BetterSqlite3.Database;
+  private statements: StatementCache;
 
   constructor(private dbPath: string) {
-    this.db = new BetterSqlite3(dbPath);
-    this.db.pragma('foreign_keys = ON');
+    this.db = openConnection(dbPath);
+    this.statements = new StatementCache(this.db);
     this.initializeTables();
   }
 
   /**
    * Initialize required tables for the user database.
+   * The whole schema is applied as one script in a single transaction, so it is parsed in one pass and committed once.
+   * Databases that already carry the current schema version are left alone; older ones get their
+   * FTS tables rebuilt from the pages and blocks tables. A newer version was written by a later build,
+   * so it is refused rather than downgraded.
    */
   private initializeTables(): void {
-    // Create workspaces table (matching Python implementation)
-    this.db.exec(`
-      CREATE TABLE IF NOT EXISTS workspaces (
-        workspace_id INTEGER PRIMARY KEY,
-        name VARCHAR(255),
-        color BLOB(3) NOT NULL
-      )
-    `);
-
-    // Create pages table (matching Python implementation)
-    this.db.exec(`
-      CREATE TABLE IF NOT EXISTS pages (
-        page_id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
-        title VARCHAR(255) NOT NULL UNIQUE,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-      )
-    `);
-
-    // Create FTS5 virtual table for full-text search of pages
-    this.db.exec(`
-      CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
-        title,
-        page_id UNINDEXED,
-        content='pages'
-      )
-    `);
-
-    // Create blocks table (matching Python implementation)
-    this.db.exec(`
-      CREATE TABLE IF NOT EXISTS blocks (
-        block_id TEXT PRIMARY KEY DEFAULT (lower(hex(randomblob(16)))),
-        content TEXT NOT NULL,
-        page_id TEXT NULL,
-        parent_block_id TEXT NULL,
-        position INTEGER NOT NULL,
-        type TEXT NOT NULL DEFAULT 'text',
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (page_id) REFERENCES pages(page_id) ON DELETE CASCADE,
-        FOREIGN KEY (parent_block_id) REFERENCES blocks(block_id) ON DELETE CASCADE,
-        CHECK (
-          (page_id IS NOT NULL AND parent_block_id IS NULL)
-          OR
-          (page_id IS NULL AND parent_block_id IS NOT NULL)
-        )
-      )
-    `);
-
-    // Create FTS5 virtual table for full-text search of blocks
-    this.db.exec(`
-      CREATE VIRTUAL TABLE IF NOT EXISTS blocks_fts USING fts5(
-        content,
-        block_id UNINDEXED,
-        page_id UNINDEXED,
-        parent_block_id UNINDEXED,
-        type UNINDEXED,
-        content='blocks'
-      )
-    `);
-
-    // Set up triggers to keep FTS tables synchronized with the main tables
-    this.setupFtsTriggers();
-
-    // Enable foreign key constraints
-    this.db.exec('PRAGMA foreign_keys = ON');
-
-    // Create default workspace if it doesn't exist
-    this.createDefaultWorkspace();
-  }
-
-  /**
-   * Set up triggers to keep FTS tables synchronized
-   */
-  private setupFtsTriggers(): void {
-    // Triggers for pages table and pages_fts (matching Python implementation)
-    this.db.exec(`
-      CREATE TRIGGER IF NOT EXISTS pages_ai AFTER INSERT ON pages
-      BEGIN
-        INSERT INTO pages_fts (rowid, title, page_id) VALUES (NEW.rowid, NEW.title, NEW.page_id);
-      END;
-    `);
-
-    this.db.exec(`
-      CREATE TRIGGER IF NOT EXISTS pages_ad AFTER DELETE ON pages
-      BEGIN
-        INSERT INTO pages_fts(pages_fts, rowid, title) VALUES('delete', OLD.rowid, OLD.title);
-      END;
-    `);
-
-    this.db.exec(`
-      CREATE TRIGGER IF NOT EXISTS pages_au AFTER UPDATE ON pages
-      BEGIN
-        INSERT INTO pages_fts(pages_fts, rowid, title) VALUES('delete', OLD.rowid, OLD.title);
-        INSERT INTO pages_fts(rowid, title, page_id) VALUES (NEW.rowid, NEW.title, NEW.page_id);
-      END;
-    `);
-
-    // Triggers for blocks table and blocks_fts (matching Python implementation)
-    this.db.exec(`
-      CREATE TRIGGER IF NOT EXISTS blocks_ai AFTER INSERT ON blocks
-      BEGIN
-        INSERT INTO blocks_fts (rowid, content, block_id, page_id, parent_block_id, type)
-        VALUES (NEW.rowid, NEW.content, NEW.block_id, NEW.page_id, NEW.parent_block_id, NEW.type);
-      END;
-    `);
-
-    this.db.exec(`
-      CREATE TRIGGER IF NOT EXISTS blocks_ad AFTER DELETE ON blocks
-      BEGIN
-        INSERT INTO blocks_fts(blocks_fts, rowid, content) VALUES('delete', OLD.rowid, OLD.content);
-      END;
-    `);
+    const version = this.db.pragma('user_version', { simple: true }) as number;
+    if (version > USER_SCHEMA_VERSION) {
+      throw new Error(`Database schema version ${version} is newer than the supported version ${USER_SCHEMA_VERSION}.`);
+    }
+    if (version === USER_SCHEMA_VERSION) {
+      return;
+    }
 
-    this.db.exec(`
-      CREATE TRIGGER IF NOT EXISTS blocks_au AFTER UPDATE ON blocks
-      BEGIN
-        INSERT INTO blocks_fts(blocks_fts, rowid, content) VALUES('delete', OLD.rowid, OLD.content);
-        INSERT INTO blocks_fts (rowid, content, block_id, page_id, parent_block_id, type)
-        VALUES (NEW.rowid, NEW.content, NEW.block_id, NEW.page_id, NEW.parent_block_id, NEW.type);
-      END;
-    `);
+    this.db.transaction(() => {
+      this.db.exec(DROP_FTS_SQL);
+      this.db.exec(USER_SCHEMA_SQL);
+      this.rebuildSearch();
+      this.db.pragma(`user_version = ${USER_SCHEMA_VERSION}`);
+    })();
   }
 
   /**
    * Add a new page to the database
    */
   addPage(title: string): string {
-    // First check if a page with this title already exists (due to UNIQUE constraint)
-    const checkStmt = this.db.prepare('SELECT page_id FROM pages WHERE title = ?');
-    const existing = checkStmt.get(title);
-    if (existing) {
+    // A duplicate title (UNIQUE constraint) inserts nothing and so returns no row
+    const insertStmt = this.statements.prepare(`
+      INSERT INTO pages (title) VALUES (?)
+      ON CONFLICT(title) DO NOTHING
+      RETURNING page_id
+    `);
+    const result = insertStmt.get(title) as { page_id: string } | undefined;
+    if (!result) {
       throw new PageAlreadyExistsError(`Page with title '${title}' already exists`);
     }
-
-    const insertStmt = this.db.prepare(`
-      INSERT INTO pages (title) VALUES (?) RETURNING page_id
-    `);
-    const result = insertStmt.get(title) as { page_id: string };
     return result.page_id;
   }
 
@@ -182,7 +189,7 @@ export class UserDatabase implements IUserDatabase {
    * Get a page by its ID
    */
   getPageById(pageId: string): Page {
-    const stmt = this.db.prepare(`
+    const stmt = this.statements.prepare(`
       SELECT page_id, title, created_at
       FROM pages
       WHERE page_id = ?
@@ -200,7 +207,7 @@ export class UserDatabase implements IUserDatabase {
    * Get all pages from the database
    */
   getAllPages(): Page[] {
-    const stmt = this.db.prepare(`
+    const stmt = this.statements.prepare(`
       SELECT page_id, title, created_at
       FROM pages
       ORDER BY created_at DESC
@@ -215,7 +222,7 @@ export class UserDatabase implements IUserDatabase {
    */
   updatePageTitle(pageId: string, newTitle: string): void {
     // Check if a different page with this title already exists
-    const checkStmt = this.db.prepare(`
+    const checkStmt = this.statements.prepare(`
       SELECT page_id FROM pages WHERE title = ? AND page_id != ?
     `);
     const existing = checkStmt.get(newTitle, pageId);
@@ -224,13 +231,13 @@ export class UserDatabase implements IUserDatabase {
     }
 
     // Get the old title to verify the page exists
-    const checkPageExists = this.db.prepare(`SELECT title FROM pages WHERE page_id = ?`);
+    const checkPageExists = this.statements.prepare(`SELECT title FROM pages WHERE page_id = ?`);
     const oldPage = checkPageExists.get(pageId);
     if (oldPage === undefined) {
       throw new PageNotFoundError(`Page with ID ${pageId} not found`);
     }
 
-    const stmt = this.db.prepare(`
+    const stmt = this.statements.prepare(`
       UPDATE pages
       SET title = ?
       WHERE page_id = ?
@@ -246,7 +253,7 @@ export class UserDatabase implements IUserDatabase {
    * Delete a page by its ID
    */
   deletePage(pageId: string): void {
-    const stmt = this.db.prepare(`
+    const stmt = this.statements.prepare(`
       DELETE FROM pages
       WHERE page_id = ?
     `);
@@ -271,20 +278,11 @@ export class UserDatabase implements IUserDatabase {
       throw new Error("A block must be associated with either a page_id or a parent_block_id - both cannot be undefined.");
     }
 
-    let result: { block_id: string } | undefined;
-
-    if (pageId !== undefined) {
-      const stmt = this.db.prepare(`
-        INSERT INTO blocks (content, position, type, page_id) VALUES (?, ?, ?, ?) RETURNING block_id
-      `);
-      result = stmt.get(content, position, type, pageId) as { block_id: string };
-    } else {
-      // parentBlockId !== undefined
-      const stmt = this.db.prepare(`
-        INSERT INTO blocks (content, position, type, parent_block_id) VALUES (?, ?, ?, ?) RETURNING block_id
-      `);
-      result = stmt.get(content, position, type, parentBlockId) as { block_id: string };
-    }
+    // Exactly one of the two parents is set; the other is bound as NULL
+    const stmt = this.statements.prepare(`
+      INSERT INTO blocks (content, position, type, page_id, parent_block_id) VALUES (?, ?, ?, ?, ?) RETURNING block_id
+    `);
+    const result = stmt.get(content, position, type, pageId ?? null, parentBlockId ?? null) as { block_id: string };
 
     return result.block_id;
   }
@@ -295,7 +293,7 @@ export class UserDatabase implements IUserDatabase {
    * Get a block by its ID
    */
   getBlockById(blockId: string): Block {
-    const stmt = this.db.prepare(`
+    const stmt = this.statements.prepare(`
       SELECT block_id, content, page_id, parent_block_id, position, type, created_at
       FROM blocks
       WHERE block_id = ?
@@ -313,7 +311,7 @@ export class UserDatabase implements IUserDatabase {
    * Get all blocks associated with a specific page
    */
   getBlocksByPageId(pageId: string): Block[] {
-    const stmt = this.db.prepare(`
+    const stmt = this.statements.prepare(`
       SELECT block_id, content, page_id, parent_block_id, position, type, created_at
       FROM blocks
       WHERE page_id = ?
@@ -329,13 +327,13 @@ export class UserDatabase implements IUserDatabase {
    */
   updateBlockContent(blockId: string, newContent: string): void {
     // Get the current block to verify it exists
-    const checkBlockExists = this.db.prepare(`SELECT block_id FROM blocks WHERE block_id = ?`);
+    const checkBlockExists = this.statements.prepare(`SELECT block_id FROM blocks WHERE block_id = ?`);
     const currentBlock = checkBlockExists.get(blockId);
     if (currentBlock === undefined) {
       throw new BlockNotFoundError(`Block with ID ${blockId} not found`);
     }
 
-    const stmt = this.db.prepare(`
+    const stmt = this.statements.prepare(`
       UPDATE blocks
       SET content = ?
       WHERE block_id = ?
@@ -356,14 +354,14 @@ export class UserDatabase implements IUserDatabase {
     }
 
     // Get the current block to verify it exists
-    const checkBlockExists = this.db.prepare(`SELECT block_id FROM blocks WHERE block_id = ?`);
+    const checkBlockExists = this.statements.prepare(`SELECT block_id FROM blocks WHERE block_id = ?`);
     const currentBlock = checkBlockExists.get(blockId);
     if (currentBlock === undefined) {
       throw new BlockNotFoundError(`Block with ID ${blockId} not found`);
     }
 
     if (newPageId !== undefined && newParentBlockId === undefined) {
-      const stmt = this.db.prepare(`
+      const stmt = this.statements.prepare(`
         UPDATE blocks SET page_id = ?, parent_block_id = NULL WHERE block_id = ?
       `);
       const result = stmt.run(newPageId, blockId);
@@ -371,7 +369,7 @@ export class UserDatabase implements IUserDatabase {
         throw new BlockNotFoundError(`Block with ID ${blockId} not found`);
       }
     } else if (newParentBlockId !== undefined && newPageId === undefined) {
-      const stmt = this.db.prepare(`
+      const stmt = this.statements.prepare(`
         UPDATE blocks SET parent_block_id = ?, page_id = NULL WHERE block_id = ?
       `);
       const result = stmt.run(newParentBlockId, blockId);
@@ -380,7 +378,7 @@ export class UserDatabase implements IUserDatabase {
       }
     } else {
       // Remove parent association - set both to NULL
-      const stmt = this.db.prepare(`
+      const stmt = this.statements.prepare(`
         UPDATE blocks SET page_id = NULL, parent_block_id = NULL WHERE block_id = ?
       `);
       const result = stmt.run(blockId);
@@ -395,13 +393,13 @@ export class UserDatabase implements IUserDatabase {
    */
   updateBlockPosition(blockId: string, newPosition: number): void {
     // Get the current block to verify it exists
-    const checkBlockExists = this.db.prepare(`SELECT block_id FROM blocks WHERE block_id = ?`);
+    const checkBlockExists = this.statements.prepare(`SELECT block_id FROM blocks WHERE block_id = ?`);
     const currentBlock = checkBlockExists.get(blockId);
     if (currentBlock === undefined) {
       throw new BlockNotFoundError(`Block with ID ${blockId} not found`);
     }
 
-    const stmt = this.db.prepare(`
+    const stmt = this.statements.prepare(`
       UPDATE blocks
       SET position = ?
       WHERE block_id = ?
@@ -417,7 +415,7 @@ export class UserDatabase implements IUserDatabase {
    * Delete a block by its ID
    */
   deleteBlock(blockId: string): void {
-    const stmt = this.db.prepare(`
+    const stmt = this.statements.prepare(`
       DELETE FROM blocks
       WHERE block_id = ?
     `);
@@ -435,7 +433,7 @@ export class UserDatabase implements IUserDatabase {
     // Convert color string to BLOB format (bytes)
     const colorBytes = Buffer.from(color.replace('#', ''), 'hex');
 
-    const stmt = this.db.prepare(`
+    const stmt = this.statements.prepare(`
       INSERT INTO workspaces (name, color) VALUES (?, ?) RETURNING workspace_id
     `);
     const result = stmt.get(name, colorBytes) as { workspace_id: number };
@@ -446,7 +444,7 @@ export class UserDatabase implements IUserDatabase {
    * Get a workspace by its ID
    */
   getWorkspaceById(workspaceId: number): Workspace {
-    const stmt = this.db.prepare(`
+    const stmt = this.statements.prepare(`
       SELECT workspace_id, name, color
       FROM workspaces
       WHERE workspace_id = ?
@@ -468,7 +466,7 @@ export class UserDatabase implements IUserDatabase {
    * Get all workspaces from the database
    */
   getAllWorkspaces(): Workspace[] {
-    const stmt = this.db.prepare(`
+    const stmt = this.statements.prepare(`
       SELECT workspace_id, name, color
       FROM workspaces
     `);
@@ -491,7 +489,7 @@ export class UserDatabase implements IUserDatabase {
     // Convert color string to BLOB format (bytes)
     const colorBytes = Buffer.from(color.replace('#', ''), 'hex');
 
-    const stmt = this.db.prepare(`
+    const stmt = this.statements.prepare(`
       UPDATE workspaces SET name = ?, color = ? WHERE workspace_id = ?
     `);
 
@@ -505,7 +503,7 @@ export class UserDatabase implements IUserDatabase {
    * Delete a workspace by its ID
    */
   deleteWorkspace(workspaceId: number): void {
-    const stmt = this.db.prepare(`
+    const stmt = this.statements.prepare(`
       DELETE FROM workspaces
       WHERE workspace_id = ?
     `);
@@ -530,14 +528,19 @@ export class UserDatabase implements IUserDatabase {
       query = this._ftsEscapeTokens(query);
     }
 
-    // Use FTS to search for pages by title with ranking
-    const ftsStmt = this.db.prepare(`
+    // Use FTS to search for pages by title with ranking.
+    // The top hits are picked from the index alone first, then joined to pages by rowid (shared through the triggers).
+    const ftsStmt = this.statements.prepare(`
+      WITH hits AS (
+        SELECT rowid, rank FROM pages_fts
+        WHERE pages_fts MATCH ?
+        ORDER BY rank
+        LIMIT ?
+      )
       SELECT p.page_id, p.title, p.created_at
-      FROM pages p
-      JOIN pages_fts pf ON p.page_id = pf.page_id
-      WHERE pages_fts MATCH ?
-      ORDER BY rank
-      LIMIT ?
+      FROM hits h
+      JOIN pages p ON p.rowid = h.rowid
+      ORDER BY h.rank
     `);
 
     const results = ftsStmt.all(query, limit);
@@ -558,14 +561,18 @@ export class UserDatabase implements IUserDatabase {
       query = this._ftsEscapeTokens(query);
     }
 
-    // Use FTS to search for blocks by content with ranking
-    const ftsStmt = this.db.prepare(`
+    // Use FTS to search for blocks by content with ranking, picking the top hits before joining (see searchPages)
+    const ftsStmt = this.statements.prepare(`
+      WITH hits AS (
+        SELECT rowid, rank FROM blocks_fts
+        WHERE blocks_fts MATCH ?
+        ORDER BY rank
+        LIMIT ?
+      )
       SELECT b.block_id, b.content, b.page_id, b.parent_block_id, b.position, b.type, b.created_at
-      FROM blocks b
-      JOIN blocks_fts bf ON b.block_id = bf.block_id
-      WHERE blocks_fts MATCH ?
-      ORDER BY rank
-      LIMIT ?
+      FROM hits h
+      JOIN blocks b ON b.rowid = h.rowid
+      ORDER BY h.rank
     `);
 
     const results = ftsStmt.all(query, limit);
@@ -599,6 +606,7 @@ export class UserDatabase implements IUserDatabase {
    * Close the database connection
    */
   close(): void {
+    this.statements.clear();
     this.db.close();
   }
 
@@ -614,22 +622,4 @@ export class UserDatabase implements IUserDatabase {
     const escapedTokens = tokens.map(t => `"${t.replace(/"/g, '""')}"*`);
     return escapedTokens.join(' ');
   }
-
-  /**
-   * Creates a default workspace if it doesn't exist.
-   */
-  private createDefaultWorkspace(): void {
-    // Check if default workspace with ID 0 already exists
-    const stmt = this.db.prepare('SELECT 1 FROM workspaces WHERE workspace_id = 0');
-    const existing = stmt.get();
-
-    if (!existing) {
-      const defaultName = 'Default';
-      const defaultColor = Buffer.from('4285F4', 'hex'); // Color as BLOB
-      const insertStmt = this.db.prepare(
-        'INSERT INTO workspaces (workspace_id, name, color) VALUES (?, ?, ?)'
-      );
-      insertStmt.run(0, defaultName, defaultColor);
-    }
-  }
 }
@@ -13,6 +13,7 @@ const errorStatusMap: { [key: string]: number } = {
   UserDatabaseNotFoundError: 404,
   PageAlreadyExistsError: 409,
   UserDatabaseAlreadyExistsError: 409,
+  UserDatabaseBusyError: 409,
 };
 
 export const errorHandler: ErrorRequestHandler = (
@@ -1,11 +1,11 @@
 import { Router, Request, Response } from 'express';
-import { BlockNotFoundError, UserDatabaseNotFoundError } from '../database/errors';
+import { BlockNotFoundError, UserDatabaseNotFoundError, UserDatabaseBusyError } from '../database/errors';
 import { getUserDatabase } from '../database/system.provider';
 import {
-  BlockCreate,
-  BlockUpdateContent,
-  BlockUpdateParent,
-  BlockUpdatePosition
+  BlockCreateSchema,
+  BlockUpdateContentSchema,
+  BlockUpdateParentSchema,
+  BlockUpdatePositionSchema
 } from './requests';
 import { Block } from '../database/entities';
 
@@ -13,17 +13,17 @@ const router: Router = Router();
 
 // POST /db/{db_id}/blocks - Create a new block
 router.post('/db/:db_id/blocks', (req: Request, res: Response) => {
-  let userDb = null;
   try {
     const { db_id } = req.params;
-    const { content, position, type = 'text', page_id, parent_block_id } = req.body as BlockCreate;
 
     // Validate request body
-    if (!content || position === undefined || !page_id) {
-      return res.status(400).json({ error: 'Content, position, and page_id are required' });
+    const parsed = BlockCreateSchema.safeParse(req.body);
+    if (!parsed.success) {
+      return res.status(400).json({ error: parsed.error.issues[0].message });
     }
+    const { content, position, type, page_id, parent_block_id } = parsed.data;
 
-    userDb = getUserDatabase(db_id);
+    const userDb = getUserDatabase(db_id);
 
     const blockId = userDb.addBlock(content, type, { position, pageId: page_id, parentBlockId: parent_block_id });
     res.status(200).json({
@@ -42,19 +42,19 @@ router.post('/db/:db_id/blocks', (req: Request, res: Response) => {
     if (error instanceof UserDatabaseNotFoundError) {
       return res.status(404).json({ error: error.message });
     }
+    if (error instanceof UserDatabaseBusyError) {
+      return res.status(409).json({ error: error.message });
+    }
     res.status(500).json({ error: 'Failed to create block' });
-  } finally {
-    userDb?.close();
   }
 });
 
 // GET /db/{db_id}/block/{block_id} - Get a specific block
 router.get('/db/:db_id/block/:block_id', (req: Request, res: Response) => {
-  let userDb = null;
   try {
     const { db_id, block_id } = req.params;
 
-    userDb = getUserDatabase(db_id);
+    const userDb = getUserDatabase(db_id);
 
     const block = userDb.getBlockById(block_id);
 
@@ -74,19 +74,19 @@ router.get('/db/:db_id/block/:block_id', (req: Request, res: Response) => {
     if (error instanceof UserDatabaseNotFoundError) {
       return res.status(404).json({ error: error.message });
     }
+    if (error instanceof UserDatabaseBusyError) {
+      return res.status(409).json({ error: error.message });
+    }
     res.status(500).json({ error: 'Failed to retrieve block' });
-  } finally {
-    userDb?.close();
   }
 });
 
 // GET /db/{db_id}/blocks/{page_id} - Get all blocks for a page
 router.get('/db/:db_id/blocks/:page_id', (req: Request, res: Response) => {
-  let userDb = null;
   try {
     const { db_id, page_id } = req.params;
 
-    userDb = getUserDatabase(db_id);
+    const userDb = getUserDatabase(db_id);
 
     const blocks = userDb.getBlocksByPageId(page_id);
 
@@ -103,24 +103,25 @@ router.get('/db/:db_id/blocks/:page_id', (req: Request, res: Response) => {
     if (error instanceof UserDatabaseNotFoundError) {
       return res.status(404).json({ error: error.message });
     }
+    if (error instanceof UserDatabaseBusyError) {
+      return res.status(409).json({ error: error.message });
+    }
     res.status(500).json({ error: 'Failed to retrieve blocks' });
-  } finally {
-    userDb?.close();
   }
 });
 
 // PUT /db/{db_id}/blocks/content - Update a block's content
 router.put('/db/:db_id/blocks/content', (req: Request, res: Response) => {
-  let userDb = null;
   try {
     const { db_id } = req.params;
-    const { block_id, new_content } = req.body as BlockUpdateContent;
 
-    if (!block_id || !new_content) {
-      return res.status(400).json({ error: 'block_id and new_content are required' });
+    const parsed = BlockUpdateContentSchema.safeParse(req.body);
+    if (!parsed.success) {
+      return res.status(400).json({ error: parsed.error.issues[0].message });
     }
+    const { block_id, new_content } = parsed.data;
 
-    userDb = getUserDatabase(db_id);
+    const userDb = getUserDatabase(db_id);
 
     userDb.updateBlockContent(block_id, new_content);
 
@@ -132,24 +133,25 @@ router.put('/db/:db_id/blocks/content', (req: Request, res: Response) => {
     if (error instanceof UserDatabaseNotFoundError) {
       return res.status(404).json({ error: error.message });
     }
+    if (error instanceof UserDatabaseBusyError) {
+      return res.status(409).json({ error: error.message });
+    }
     res.status(500).json({ error: 'Failed to update block content' });
-  } finally {
-    userDb?.close();
   }
 });
 
 // PUT /db/{db_id}/blocks/position - Update a block's position
 router.put('/db/:db_id/blocks/position', (req: Request, res: Response) => {
-  let userDb = null;
   try {
     const { db_id } = req.params;
-    const { block_id, new_position, new_parent_block_id } = req.body as BlockUpdatePosition;
 
-    if (!block_id || new_position === undefined) {
-      return res.status(400).json({ error: 'block_id and new_position are required' });
+    const parsed = BlockUpdatePositionSchema.safeParse(req.body);
+    if (!parsed.success) {
+      return res.status(400).json({ error: parsed.error.issues[0].message });
     }
+    const { block_id, new_position, new_parent_block_id } = parsed.data;
 
-    userDb = getUserDatabase(db_id);
+    const userDb = getUserDatabase(db_id);
 
     if (new_parent_block_id !== undefined) {
       userDb.updateBlockParent(block_id, undefined, new_parent_block_id);
@@ -164,26 +166,27 @@ router.put('/db/:db_id/blocks/position', (req: Request, res: Response) => {
     if (error instanceof UserDatabaseNotFoundError) {
       return res.status(404).json({ error: error.message });
     }
+    if (error instanceof UserDatabaseBusyError) {
+      return res.status(409).json({ error: error.message });
+    }
     res.status(500).json({ error: 'Failed to update block position' });
-  } finally {
-    userDb?.close();
   }
 });
 
 // PUT /db/{db_id}/blocks/parent - Update a block's parent
 router.put('/db/:db_id/blocks/parent', (req: Request, res: Response) => {
-  let userDb = null;
   try {
     const { db_id } = req.params;
-    const { block_id, new_page_id, new_parent_block_id } = req.body as BlockUpdateParent;
 
-    if (!block_id) {
-      return res.status(400).json({ error: 'block_id is required' });
+    const parsed = BlockUpdateParentSchema.safeParse(req.body);
+    if (!parsed.success) {
+      return res.status(400).json({ error: parsed.error.issues[0].message });
     }
+    const { block_id, new_page_id, new_parent_block_id } = parsed.data;
 
-    userDb = getUserDatabase(db_id);
+    const userDb = getUserDatabase(db_id);
 
-    userDb.updateBlockParent(block_id, new_page_id, new_parent_block_id);
+    userDb.updateBlockParent(block_id, new_page_id ?? undefined, new_parent_block_id ?? undefined);
 
     res.json({ status: 'success' });
   } catch (error) {
@@ -193,19 +196,19 @@ router.put('/db/:db_id/blocks/parent', (req: Request, res: Response) => {
     if (error instanceof UserDatabaseNotFoundError) {
       return res.status(404).json({ error: error.message });
     }
+    if (error instanceof UserDatabaseBusyError) {
+      return res.status(409).json({ error: error.message });
+    }
     res.status(500).json({ error: 'Failed to update block parent' });
-  } finally {
-    userDb?.close();
   }
 });
 
 // DELETE /db/{db_id}/blocks/{block_id} - Delete a block
 router.delete('/db/:db_id/blocks/:block_id', (req: Request, res: Response) => {
-  let userDb = null;
   try {
     const { db_id, block_id } = req.params;
 
-    userDb = getUserDatabase(db_id);
+    const userDb = getUserDatabase(db_id);
 
     userDb.deleteBlock(block_id);
 
@@ -217,9 +220,10 @@ router.delete('/db/:db_id/blocks/:block_id', (req: Request, res: Response) => {
     if (error instanceof UserDatabaseNotFoundError) {
       return res.status(404).json({ error: error.message });
     }
+    if (error instanceof UserDatabaseBusyError) {
+      return res.status(409).json({ error: error.message });
+    }
     res.status(500).json({ error: 'Failed to delete block' });
-  } finally {
-    userDb?.close();
   }
 });
 
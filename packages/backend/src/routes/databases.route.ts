@@ -1,7 +1,7 @@
 import { Router, Request, Response } from 'express';
 import { SystemDatabase } from '../database/system';
 import { UserDatabaseNotFoundError, UserDatabaseAlreadyExistsError } from '../database/errors';
-import { SystemDatabaseProvider } from '../database/system.provider';
+import { SystemDatabaseProvider, UserDatabaseProvider } from '../database/system.provider';
 import { DatabaseCreate, DatabaseUpdate } from './requests';
 
 const router: Router = Router();
@@ -66,8 +66,9 @@ router.put('/databases/:db_id', async (req: Request, res: Response) => {
       return res.status(400).json({ error: 'Name is required' });
     }
 
+    // The database file is renamed, so no connection may stay open on, or be opened against, either path meanwhile
     const sysDb = SystemDatabaseProvider.getInstance();
-    const success = await sysDb.updateUserDatabase(db_id, name);
+    const success = await UserDatabaseProvider.runFileOperation(db_id, () => sysDb.updateUserDatabase(db_id, name));
 
     res.json({ message: 'Database updated successfully' });
   } catch (error) {
@@ -86,8 +87,9 @@ router.delete('/databases/:db_id', async (req: Request, res: Response) => {
   try {
     const { db_id } = req.params;
 
+    // The database file is removed, so no connection may stay open on it or recreate it meanwhile
     const sysDb = SystemDatabaseProvider.getInstance();
-    const success = await sysDb.deleteUserDatabase(db_id);
+    const success = await UserDatabaseProvider.runFileOperation(db_id, () => sysDb.deleteUserDatabase(db_id));
 
     res.json({ message: 'Database deleted successfully' });
   } catch (error) {
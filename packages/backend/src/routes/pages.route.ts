@@ -1,24 +1,24 @@
 import { Router, Request, Response } from 'express';
-import { PageNotFoundError, PageAlreadyExistsError, UserDatabaseNotFoundError } from '../database/errors';
+import { PageNotFoundError, PageAlreadyExistsError, UserDatabaseNotFoundError, UserDatabaseBusyError } from '../database/errors';
 import { getUserDatabase } from '../database/system.provider';
-import { PageCreate, PageRename } from './requests';
+import { PageCreateSchema, PageRenameSchema } from './requests';
 import { Page } from '../database/entities';
 
 const router: Router = Router();
 
 // POST /db/{db_id}/pages - Create a new page
 router.post('/db/:db_id/pages', (req: Request, res: Response) => {
-  let userDb = null;
   try {
     const { db_id } = req.params;
-    const { title } = req.body as PageCreate;
 
     // Validate request body
-    if (!title) {
-      return res.status(400).json({ error: 'Title is required' });
+    const parsed = PageCreateSchema.safeParse(req.body);
+    if (!parsed.success) {
+      return res.status(400).json({ error: parsed.error.issues[0].message });
     }
+    const { title } = parsed.data;
 
-    userDb = getUserDatabase(db_id);
+    const userDb = getUserDatabase(db_id);
 
     const pageId = userDb.addPage(title);
     res.status(200).json({ page_id: pageId });
@@ -29,19 +29,19 @@ router.post('/db/:db_id/pages', (req: Request, res: Response) => {
     if (error instanceof UserDatabaseNotFoundError) {
       return res.status(404).json({ error: error.message });
     }
+    if (error instanceof UserDatabaseBusyError) {
+      return res.status(409).json({ error: error.message });
+    }
     res.status(500).json({ error: 'Failed to create page' });
-  } finally {
-    userDb?.close();
   }
 });
 
 // GET /db/{db_id}/pages/{page_id} - Get a specific page
 router.get('/db/:db_id/pages/:page_id', (req: Request, res: Response) => {
-  let userDb = null;
   try {
     const { db_id, page_id } = req.params;
 
-    userDb = getUserDatabase(db_id);
+    const userDb = getUserDatabase(db_id);
 
     const page = userDb.getPageById(page_id);
 
@@ -57,19 +57,19 @@ router.get('/db/:db_id/pages/:page_id', (req: Request, res: Response) => {
     if (error instanceof UserDatabaseNotFoundError) {
       return res.status(404).json({ error: error.message });
     }
+    if (error instanceof UserDatabaseBusyError) {
+      return res.status(409).json({ error: error.message });
+    }
     res.status(500).json({ error: 'Failed to retrieve page' });
-  } finally {
-    userDb?.close();
   }
 });
 
 // GET /db/{db_id}/pages - Get all pages
 router.get('/db/:db_id/pages', (req: Request, res: Response) => {
-  let userDb = null;
   try {
     const { db_id } = req.params;
 
-    userDb = getUserDatabase(db_id);
+    const userDb = getUserDatabase(db_id);
 
     const pages = userDb.getAllPages();
     res.json(pages.map(page => ({
@@ -81,25 +81,26 @@ router.get('/db/:db_id/pages', (req: Request, res: Response) => {
     if (error instanceof UserDatabaseNotFoundError) {
       return res.status(404).json({ error: error.message });
     }
+    if (error instanceof UserDatabaseBusyError) {
+      return res.status(409).json({ error: error.message });
+    }
     res.status(500).json({ error: 'Failed to retrieve pages' });
-  } finally {
-    userDb?.close();
   }
 });
 
 // PUT /db/{db_id}/pages - Rename a page
 router.put('/db/:db_id/pages', (req: Request, res: Response) => {
-  let userDb = null;
   try {
     const { db_id } = req.params;
-    const { page_id, new_title } = req.body as PageRename;
 
     // Validate request body
-    if (!page_id || !new_title) {
-      return res.status(400).json({ error: 'page_id and new_title are required' });
+    const parsed = PageRenameSchema.safeParse(req.body);
+    if (!parsed.success) {
+      return res.status(400).json({ error: parsed.error.issues[0].message });
     }
+    const { page_id, new_title } = parsed.data;
 
-    userDb = getUserDatabase(db_id);
+    const userDb = getUserDatabase(db_id);
 
     userDb.updatePageTitle(page_id, new_title);
 
@@ -114,19 +115,19 @@ router.put('/db/:db_id/pages', (req: Request, res: Response) => {
     if (error instanceof UserDatabaseNotFoundError) {
       return res.status(404).json({ error: error.message });
     }
+    if (error instanceof UserDatabaseBusyError) {
+      return res.status(409).json({ error: error.message });
+    }
     res.status(500).json({ error: 'Failed to rename page' });
-  } finally {
-    userDb?.close();
   }
 });
 
 // DELETE /db/{db_id}/pages/{page_id} - Delete a page
 router.delete('/db/:db_id/pages/:page_id', (req: Request, res: Response) => {
-  let userDb = null;
   try {
     const { db_id, page_id } = req.params;
 
-    userDb = getUserDatabase(db_id);
+    const userDb = getUserDatabase(db_id);
 
     userDb.deletePage(page_id);
 
@@ -138,9 +139,10 @@ router.delete('/db/:db_id/pages/:page_id', (req: Request, res: Response) => {
     if (error instanceof UserDatabaseNotFoundError) {
       return res.status(404).json({ error: error.message });
     }
+    if (error instanceof UserDatabaseBusyError) {
+      return res.status(409).json({ error: error.message });
+    }
     res.status(500).json({ error: 'Failed to delete page' });
-  } finally {
-    userDb?.close();
   }
 });
 
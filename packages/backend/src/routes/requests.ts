@@ -1,3 +1,5 @@
+import { z } from 'zod';
+
 // Request body types
 export interface DatabaseCreate {
   name: string;
@@ -8,40 +10,6 @@ export interface DatabaseUpdate {
   name: string;
 }
 
-export interface PageCreate {
-  title: string;
-}
-
-export interface PageRename {
-  page_id: string;
-  new_title: string;
-}
-
-export interface BlockCreate {
-  content: string;
-  position: number;
-  type?: string;  // default to "text"
-  page_id?: string;
-  parent_block_id?: string;
-}
-
-export interface BlockUpdateContent {
-  block_id: string;
-  new_content: string;
-}
-
-export interface BlockUpdateParent {
-  block_id: string;
-  new_page_id?: string;
-  new_parent_block_id?: string;
-}
-
-export interface BlockUpdatePosition {
-  block_id: string;
-  new_position: number;
-  new_parent_block_id?: string;
-}
-
 export interface WorkspaceCreate {
   name: string;
   color: string;
@@ -53,9 +21,75 @@ export interface WorkspaceUpdate {
   new_color: string;
 }
 
-export interface SearchRequest {
-  query: string;
-  limit?: number;
-  search_type?: string;
-  advanced?: boolean;
-}
+// Search requests are validated with a schema so the checks can be exercised without going through HTTP
+export const SearchRequestSchema = z.object({
+  query: z.string({ error: 'Query is required' }).min(1, 'Query is required'),
+  limit: z.number().default(10),
+  search_type: z.enum(['pages', 'blocks', 'all'], {
+    error: "Invalid search_type. Must be 'pages', 'blocks', or 'all'"
+  }).default('all'),
+  advanced: z.boolean().default(false)
+});
+
+export type SearchRequest = z.infer<typeof SearchRequestSchema>;
+
+// Page and block bodies are validated with zod so a missing field or a non-object body gets a 400; without a JSON
+// body req.body is undefined, and destructuring it used to throw a TypeError and return 500
+const PAGE_TITLE_REQUIRED = 'Title is required';
+
+export const PageCreateSchema = z.object({
+  title: z.string({ error: PAGE_TITLE_REQUIRED }).min(1, PAGE_TITLE_REQUIRED)
+}, { error: PAGE_TITLE_REQUIRED });
+
+export type PageCreate = z.infer<typeof PageCreateSchema>;
+
+const BLOCK_FIELDS_REQUIRED = 'Content, position, and page_id are required';
+
+export const BlockCreateSchema = z.object({
+  content: z.string({ error: BLOCK_FIELDS_REQUIRED }).min(1, BLOCK_FIELDS_REQUIRED),
+  position: z.number({ error: BLOCK_FIELDS_REQUIRED }),
+  type: z.string().default('text'),
+  page_id: z.string({ error: BLOCK_FIELDS_REQUIRED }).min(1, BLOCK_FIELDS_REQUIRED),
+  parent_block_id: z.string().optional()
+}, { error: BLOCK_FIELDS_REQUIRED });
+
+export type BlockCreate = z.infer<typeof BlockCreateSchema>;
+
+const PAGE_RENAME_REQUIRED = 'page_id and new_title are required';
+
+export const PageRenameSchema = z.object({
+  page_id: z.string({ error: PAGE_RENAME_REQUIRED }).min(1, PAGE_RENAME_REQUIRED),
+  new_title: z.string({ error: PAGE_RENAME_REQUIRED }).min(1, PAGE_RENAME_REQUIRED)
+}, { error: PAGE_RENAME_REQUIRED });
+
+export type PageRename = z.infer<typeof PageRenameSchema>;
+
+const BLOCK_CONTENT_REQUIRED = 'block_id and new_content are required';
+
+export const BlockUpdateContentSchema = z.object({
+  block_id: z.string({ error: BLOCK_CONTENT_REQUIRED }).min(1, BLOCK_CONTENT_REQUIRED),
+  new_content: z.string({ error: BLOCK_CONTENT_REQUIRED }).min(1, BLOCK_CONTENT_REQUIRED)
+}, { error: BLOCK_CONTENT_REQUIRED });
+
+export type BlockUpdateContent = z.infer<typeof BlockUpdateContentSchema>;
+
+const BLOCK_POSITION_REQUIRED = 'block_id and new_position are required';
+
+export const BlockUpdatePositionSchema = z.object({
+  block_id: z.string({ error: BLOCK_POSITION_REQUIRED }).min(1, BLOCK_POSITION_REQUIRED),
+  new_position: z.number({ error: BLOCK_POSITION_REQUIRED }),
+  new_parent_block_id: z.string().optional()
+}, { error: BLOCK_POSITION_REQUIRED });
+
+export type BlockUpdatePosition = z.infer<typeof BlockUpdatePositionSchema>;
+
+const BLOCK_ID_REQUIRED = 'block_id is required';
+
+// The frontend sends new_page_id: null when moving a block under another block
+export const BlockUpdateParentSchema = z.object({
+  block_id: z.string({ error: BLOCK_ID_REQUIRED }).min(1, BLOCK_ID_REQUIRED),
+  new_page_id: z.string().nullish(),
+  new_parent_block_id: z.string().nullish()
+}, { error: BLOCK_ID_REQUIRED });
+
+export type BlockUpdateParent = z.infer<typeof BlockUpdateParentSchema>;
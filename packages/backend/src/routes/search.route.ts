@@ -1,24 +1,24 @@
 import { Router, Request, Response } from 'express';
-import { UserDatabaseNotFoundError } from '../database/errors';
+import { UserDatabaseNotFoundError, UserDatabaseBusyError } from '../database/errors';
 import { getUserDatabase } from '../database/system.provider';
-import { SearchRequest } from './requests';
+import { SearchRequestSchema } from './requests';
 import { Page, Block } from '../database/entities';
 
 const router: Router = Router();
 
 // POST /db/{db_id}/search - Search for pages and/or blocks
 router.post('/db/:db_id/search', (req: Request, res: Response) => {
-  let userDb = null;
   try {
     const { db_id } = req.params;
-    const { query, limit = 10, search_type = "all", advanced = false } = req.body as SearchRequest;
 
     // Validate request body
-    if (!query) {
-      return res.status(400).json({ error: 'Query is required' });
+    const parsed = SearchRequestSchema.safeParse(req.body);
+    if (!parsed.success) {
+      return res.status(400).json({ error: parsed.error.issues[0].message });
     }
+    const { query, limit, search_type, advanced } = parsed.data;
 
-    userDb = getUserDatabase(db_id);
+    const userDb = getUserDatabase(db_id);
 
     // Determine whether to escape special characters based on advanced mode
     const escapeSpecialChars = !advanced;
@@ -31,10 +31,8 @@ router.post('/db/:db_id/search', (req: Request, res: Response) => {
     } else if (search_type === "blocks") {
       pages = [];
       blocks = userDb.searchBlocks(query, limit, escapeSpecialChars);
-    } else if (search_type === "all") {
-      [pages, blocks] = userDb.searchAll(query, limit, escapeSpecialChars);
     } else {
-      return res.status(400).json({ error: "Invalid search_type. Must be 'pages', 'blocks', or 'all'" });
+      [pages, blocks] = userDb.searchAll(query, limit, escapeSpecialChars);
     }
 
     // Format the results to match the expected response
@@ -62,19 +60,19 @@ router.post('/db/:db_id/search', (req: Request, res: Response) => {
     if (error instanceof UserDatabaseNotFoundError) {
       return res.status(404).json({ error: error.message });
     }
+    if (error instanceof UserDatabaseBusyError) {
+      return res.status(409).json({ error: error.message });
+    }
     res.status(500).json({ error: `Search failed: ${error}` });
-  } finally {
-    userDb?.close();
   }
 });
 
 // POST /db/{db_id}/rebuild-search - Rebuild the search index
 router.post('/db/:db_id/rebuild-search', (req: Request, res: Response) => {
-  let userDb = null;
   try {
     const { db_id } = req.params;
 
-    userDb = getUserDatabase(db_id);
+    const userDb = getUserDatabase(db_id);
 
     // Rebuild the search index
     userDb.rebuildSearch();
@@ -84,9 +82,10 @@ router.post('/db/:db_id/rebuild-search', (req: Request, res: Response) => {
     if (error instanceof UserDatabaseNotFoundError) {
       return res.status(404).json({ error: error.message });
     }
+    if (error instanceof UserDatabaseBusyError) {
+      return res.status(409).json({ error: error.message });
+    }
     res.status(500).json({ error: `Rebuild search failed: ${error}` });
-  } finally {
-    userDb?.close();
   }
 });
 
@@ -1,5 +1,5 @@
 import { Router, Request, Response } from 'express';
-import { WorkspaceNotFoundError, UserDatabaseNotFoundError } from '../database/errors';
+import { WorkspaceNotFoundError, UserDatabaseNotFoundError, UserDatabaseBusyError } from '../database/errors';
 import { getUserDatabase } from '../database/system.provider';
 import { WorkspaceCreate, WorkspaceUpdate } from './requests';
 import { Workspace } from '../database/entities';
@@ -8,7 +8,6 @@ const router: Router = Router();
 
 // POST /db/{db_id}/workspaces - Create a new workspace
 router.post('/db/:db_id/workspaces', (req: Request, res: Response) => {
-  let userDb = null;
   try {
     const { db_id } = req.params;
     const { name, color } = req.body as WorkspaceCreate;
@@ -18,7 +17,7 @@ router.post('/db/:db_id/workspaces', (req: Request, res: Response) => {
       return res.status(400).json({ error: 'Name and color are required' });
     }
 
-    userDb = getUserDatabase(db_id);
+    const userDb = getUserDatabase(db_id);
 
     const workspaceId = userDb.addWorkspace(name, color);
     res.status(200).json({
@@ -33,19 +32,19 @@ router.post('/db/:db_id/workspaces', (req: Request, res: Response) => {
     if (error instanceof UserDatabaseNotFoundError) {
       return res.status(404).json({ error: error.message });
     }
+    if (error instanceof UserDatabaseBusyError) {
+      return res.status(409).json({ error: error.message });
+    }
     res.status(500).json({ error: 'Failed to create workspace' });
-  } finally {
-    userDb?.close();
   }
 });
 
 // GET /db/{db_id}/workspaces/{workspace_id} - Get a specific workspace
 router.get('/db/:db_id/workspaces/:workspace_id', (req: Request, res: Response) => {
-  let userDb = null;
   try {
     const { db_id, workspace_id } = req.params;
 
-    userDb = getUserDatabase(db_id);
+    const userDb = getUserDatabase(db_id);
 
     const workspaceIdNum = parseInt(workspace_id, 10);
     const workspace = userDb.getWorkspaceById(workspaceIdNum);
@@ -62,19 +61,19 @@ router.get('/db/:db_id/workspaces/:workspace_id', (req: Request, res: Response)
     if (error instanceof UserDatabaseNotFoundError) {
       return res.status(404).json({ error: error.message });
     }
+    if (error instanceof UserDatabaseBusyError) {
+      return res.status(409).json({ error: error.message });
+    }
     res.status(500).json({ error: 'Failed to retrieve workspace' });
-  } finally {
-    userDb?.close();
   }
 });
 
 // GET /db/{db_id}/workspaces - Get all workspaces
 router.get('/db/:db_id/workspaces', (req: Request, res: Response) => {
-  let userDb = null;
   try {
     const { db_id } = req.params;
 
-    userDb = getUserDatabase(db_id);
+    const userDb = getUserDatabase(db_id);
 
     const workspaces = userDb.getAllWorkspaces();
     res.json(workspaces.map(workspace => ({
@@ -86,15 +85,15 @@ router.get('/db/:db_id/workspaces', (req: Request, res: Response) => {
     if (error instanceof UserDatabaseNotFoundError) {
       return res.status(404).json({ error: error.message });
     }
+    if (error instanceof UserDatabaseBusyError) {
+      return res.status(409).json({ error: error.message });
+    }
     res.status(500).json({ error: 'Failed to retrieve workspaces' });
-  } finally {
-    userDb?.close();
   }
 });
 
 // PUT /db/{db_id}/workspaces - Update a workspace
 router.put('/db/:db_id/workspaces', (req: Request, res: Response) => {
-  let userDb = null;
   try {
     const { db_id } = req.params;
     const { workspace_id, new_name, new_color } = req.body as WorkspaceUpdate;
@@ -104,7 +103,7 @@ router.put('/db/:db_id/workspaces', (req: Request, res: Response) => {
       return res.status(400).json({ error: 'workspace_id, new_name and new_color are required' });
     }
 
-    userDb = getUserDatabase(db_id);
+    const userDb = getUserDatabase(db_id);
 
     userDb.updateWorkspace(Number(workspace_id), new_name, new_color);
 
@@ -116,19 +115,19 @@ router.put('/db/:db_id/workspaces', (req: Request, res: Response) => {
     if (error instanceof UserDatabaseNotFoundError) {
       return res.status(404).json({ error: error.message });
     }
+    if (error instanceof UserDatabaseBusyError) {
+      return res.status(409).json({ error: error.message });
+    }
     res.status(500).json({ error: 'Failed to update workspace' });
-  } finally {
-    userDb?.close();
   }
 });
 
 // DELETE /db/{db_id}/workspaces/{workspace_id} - Delete a workspace
 router.delete('/db/:db_id/workspaces/:workspace_id', (req: Request, res: Response) => {
-  let userDb = null;
   try {
     const { db_id, workspace_id } = req.params;
 
-    userDb = getUserDatabase(db_id);
+    const userDb = getUserDatabase(db_id);
 
     const workspaceIdNum = parseInt(workspace_id, 10);
     userDb.deleteWorkspace(workspaceIdNum);
@@ -141,9 +140,10 @@ router.delete('/db/:db_id/workspaces/:workspace_id', (req: Request, res: Respons
     if (error instanceof UserDatabaseNotFoundError) {
       return res.status(404).json({ error: error.message });
     }
+    if (error instanceof UserDatabaseBusyError) {
+      return res.status(409).json({ error: error.message });
+    }
     res.status(500).json({ error: 'Failed to delete workspace' });
-  } finally {
-    userDb?.close();
   }
 });
 
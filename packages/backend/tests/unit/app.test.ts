@@ -0,0 +1,38 @@
+import { afterAll, beforeAll, describe, expect, test } from 'vitest';
+import { setupTestApi, teardownTestApi, ApiTestSetup } from './test-utils/api-test-setup';
+
+// The app-level wiring around the routers: health check, unknown routes and CORS
+describe('App', () => {
+  let apiSetup: ApiTestSetup;
+  let api: ApiTestSetup['api'];
+
+  beforeAll(() => {
+    apiSetup = setupTestApi();
+    api = apiSetup.api;
+  });
+
+  afterAll(async () => {
+    await teardownTestApi(apiSetup);
+  });
+
+  test('should report health', async () => {
+    const response = await api.get('/health').expect(200);
+
+    expect(response.body.status).toBe('OK');
+  });
+
+  test('should return a JSON 404 for unknown routes', async () => {
+    const response = await api.get('/no/such/route').expect(404);
+
+    expect(response.body).toEqual({ error: 'Route not found' });
+  });
+
+  test('should allow the dev frontend origin', async () => {
+    const response = await api
+      .get('/health')
+      .set('Origin', 'http://localhost:5173')
+      .expect(200);
+
+    expect(response.headers['access-control-allow-origin']).toBe('http://localhost:5173');
+  });
+});
@@ -1,23 +1,40 @@
-import { beforeEach, afterEach, describe, expect, test} from 'vitest';
+import { beforeAll, afterAll, beforeEach, afterEach, describe, expect, test} from 'vitest';
 import fs from 'fs';
 import path from 'path';
 import { SystemDatabase } from '../../../src/database/system';
 import { UserDatabase } from '../../../src/database/user';
 import { UserDatabaseAlreadyExistsError, UserDatabaseNotFoundError } from '../../../src/database/errors';
-import { setupTestSystemDatabase, teardownTestSystemDatabase, DbTestSetup } from '../test-utils/db-test-setup';
+import {
+  setupTestSystemDatabase,
+  teardownTestSystemDatabase,
+  beginTestTransaction,
+  rollbackTestTransaction,
+  DbTestSetup
+} from '../test-utils/db-test-setup';
 
 describe('SystemDatabase', () => {
   let testSetup: DbTestSetup;
   let tempDir: string;
   let sysDb: SystemDatabase;
 
-  beforeEach(() => {
+  beforeAll(() => {
+    // One system database is shared by every test in this file
     testSetup = setupTestSystemDatabase();
     tempDir = testSetup.tempDir;
     sysDb = testSetup.sysDb;
   });
 
+  beforeEach(() => {
+    // Each test's rows are rolled back afterwards. User database files the tests create have unique names,
+    // so leaving them in the temp directory until teardown does not affect other tests.
+    beginTestTransaction(sysDb);
+  });
+
   afterEach(() => {
+    rollbackTestTransaction(sysDb);
+  });
+
+  afterAll(() => {
     teardownTestSystemDatabase(testSetup);
   });
 
@@ -81,6 +98,17 @@ describe('SystemDatabase', () => {
     expect(retrievedDbInfo.name).toBe(dbName);
   });
 
+  test('[read] repeated lookups should reuse their prepared statement', async () => {
+    const dbInfo = await sysDb.addUserDatabase('test_db');
+    sysDb.getUserDatabaseById(dbInfo.id);
+    const cachedStatements = sysDb['statements'].size;
+
+    sysDb.getUserDatabaseById(dbInfo.id);
+    sysDb.getUserDatabaseByPath(dbInfo.path);
+    sysDb.getUserDatabaseByPath(dbInfo.path);
+    expect(sysDb['statements'].size).toBe(cachedStatements + 1);
+  });
+
   test('[read] should throw error when getting database by path that does not exist', () => {
     // Test that getting a database by path that doesn't exist raises an error
     expect(() => {
@@ -90,8 +118,7 @@ describe('SystemDatabase', () => {
 
   test('[read] should return all user databases', async () => {
     // Add two databases
-    await sysDb.addUserDatabase('test_db1');
-    await sysDb.addUserDatabase('test_db2');
+    await Promise.all([sysDb.addUserDatabase('test_db1'), sysDb.addUserDatabase('test_db2')]);
 
     const allDbs = sysDb.getAllUserDatabases();
     expect(allDbs).toHaveLength(2);
@@ -142,8 +169,7 @@ describe('SystemDatabase', () => {
 
   test('[update] should throw error when updating database to existing name', async () => {
     // Test that updating a database to a name that already exists raises an error
-    await sysDb.addUserDatabase('test_db1');
-    await sysDb.addUserDatabase('test_db2');
+    await Promise.all([sysDb.addUserDatabase('test_db1'), sysDb.addUserDatabase('test_db2')]);
 
     const db1Info = sysDb.getUserDatabaseByName('test_db1');
 
@@ -207,6 +233,37 @@ describe('SystemDatabase', () => {
     expect(fs.existsSync(newDbPath)).toBe(true); // New file should exist
   });
 
+  test('[update] should move a leftover WAL file along with the database file', async () => {
+    const dbInfo = await sysDb.addUserDatabase('wal_original_db');
+
+    // Leave the registered file as a crash would: the last commit is still only in its -wal file
+    const sourcePath = path.join(tempDir, 'crash_source.db');
+    const sourceDb = new UserDatabase(sourcePath);
+    sourceDb.addPage('Unsaved Page');
+    fs.copyFileSync(sourcePath, dbInfo.path);
+    fs.copyFileSync(`${sourcePath}-wal`, `${dbInfo.path}-wal`);
+    sourceDb.close();
+
+    await sysDb.updateUserDatabase(dbInfo.id, 'wal_renamed_db');
+    const renamedPath = sysDb.getUserDatabaseById(dbInfo.id).path;
+
+    expect(fs.existsSync(`${dbInfo.path}-wal`)).toBe(false);
+    const renamedDb = new UserDatabase(renamedPath);
+    expect(renamedDb.getAllPages().map(page => page.title)).toEqual(['Unsaved Page']);
+    renamedDb.close();
+  });
+
+  test('[delete] should remove leftover WAL files with the database file', async () => {
+    const dbInfo = await sysDb.addUserDatabase('wal_test_db');
+    for (const file of [dbInfo.path, `${dbInfo.path}-wal`, `${dbInfo.path}-shm`]) {
+      fs.writeFileSync(file, '');
+    }
+
+    await sysDb.deleteUserDatabase(dbInfo.id);
+
+    expect(fs.readdirSync(tempDir).filter(file => file.startsWith('wal_test_db.db'))).toEqual([]);
+  });
+
   test('[delete] should throw error when trying to delete non-existent database', async () => {
     // Test that deleting a database that doesn't exist raises an error
     await expect(sysDb.deleteUserDatabase('non_existent_db_id'))
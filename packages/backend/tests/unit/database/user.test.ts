@@ -1,38 +1,80 @@
-import { beforeEach, afterEach, describe, expect, test } from 'vitest';
-import { UserDatabase } from '../../../src/database/user';
+import { beforeAll, afterAll, beforeEach, afterEach, describe, expect, test } from 'vitest';
+import { UserDatabase, USER_SCHEMA_VERSION } from '../../../src/database/user';
 import {
   PageNotFoundError,
   PageAlreadyExistsError,
   BlockNotFoundError,
   WorkspaceNotFoundError
 } from '../../../src/database/errors';
+import {
+  createTestUserDatabase,
+  beginTestTransaction,
+  rollbackTestTransaction,
+  addTestPages,
+  addTestBlocks,
+  addTestWorkspaces
+} from '../test-utils/db-test-setup';
+
+// Raised by addBlock and updateBlockParent unless exactly one of page_id and parent_block_id is given
+const BLOCK_PARENT_ERROR = /A block must be associated with either a page_id or a parent_block_id, but not both/;
 
 describe('UserDatabase', () => {
   let db: UserDatabase;
 
+  beforeAll(() => {
+    // One in-memory database is shared by every test in this block
+    db = createTestUserDatabase();
+  });
+
   beforeEach(() => {
-    // Create a new in-memory database for each test
-    db = new UserDatabase(':memory:');
+    // Each test runs inside a savepoint that is rolled back afterwards, leaving the database empty again
+    beginTestTransaction(db);
   });
 
   afterEach(() => {
-    // Close the database connection after each test
+    rollbackTestTransaction(db);
+  });
+
+  afterAll(() => {
     db.close();
   });
 
   test('initializeTables should create required tables', () => {
     // Test if tables are created by checking if they exist
-    const checkPagesTable = db['db'].prepare(`
-      SELECT name FROM sqlite_master WHERE type='table' AND name='pages'
-    `);
-    const pagesResult = checkPagesTable.get();
-    expect(pagesResult).not.toBeNull();
+    const tables = db['db'].prepare(`
+      SELECT name FROM sqlite_master WHERE type='table' AND name IN ('pages', 'blocks')
+    `).pluck().all();
+    expect(tables).toEqual(expect.arrayContaining(['pages', 'blocks']));
+  });
+
+  test('initializeTables should be safe to run against an existing schema', () => {
+    db['initializeTables']();
+
+    const workspaces = db.getAllWorkspaces();
+    expect(workspaces).toHaveLength(1);
+    expect(workspaces[0]).toEqual({ workspace_id: 0, name: 'Default', color: '#4285f4' });
+  });
+
+  test('initializeTables should rebuild the search index of an older schema', () => {
+    const pageId = db.addPage('Python Tutorial');
+    db['db'].pragma('user_version = 1');
+
+    db['initializeTables']();
+
+    expect(db['db'].pragma('user_version', { simple: true })).toBe(USER_SCHEMA_VERSION);
+    expect(db.searchPages('Py').map(page => page.page_id)).toEqual([pageId]);
+  });
 
-    const checkBlocksTable = db['db'].prepare(`
-      SELECT name FROM sqlite_master WHERE type='table' AND name='blocks'
-    `);
-    const blocksResult = checkBlocksTable.get();
-    expect(blocksResult).not.toBeNull();
+  test('initializeTables should refuse a newer schema version instead of downgrading it', () => {
+    const pageId = db.addPage('Python Tutorial');
+    db['db'].pragma(`user_version = ${USER_SCHEMA_VERSION + 1}`);
+
+    expect(() => {
+      db['initializeTables']();
+    }).toThrow(/newer than the supported version/);
+
+    expect(db['db'].pragma('user_version', { simple: true })).toBe(USER_SCHEMA_VERSION + 1);
+    expect(db.searchPages('Py').map(page => page.page_id)).toEqual([pageId]);
   });
 
   test('addPage should add a new page', () => {
@@ -43,6 +85,16 @@ describe('UserDatabase', () => {
     expect(page.title).toBe('Test Page');
   });
 
+  test('repeated queries should reuse their prepared statement', () => {
+    const pageId = db.addPage('Test Page');
+    db.getPageById(pageId);
+    const cachedStatements = db['statements'].size;
+
+    db.getPageById(pageId);
+    db.addPage('Another Page');
+    expect(db['statements'].size).toBe(cachedStatements);
+  });
+
   test('updatePageTitle should rename a page', () => {
     const pageId = db.addPage('Old Title');
 
@@ -54,16 +106,9 @@ describe('UserDatabase', () => {
     expect(updatedPage.title).toBe('New Title');
   });
 
-  test('updatePageTitle should throw error when renaming non-existent page', () => {
-    expect(() => {
-      db.updatePageTitle('non_existent_id', 'New Title');
-    }).toThrow(PageNotFoundError);
-  });
-
   test('addPage should throw error when adding page with duplicate title', () => {
     // Add the first page
-    const pageId1 = db.addPage('Test Page');
-    expect(typeof pageId1).toBe('string');
+    db.addPage('Test Page');
 
     // Try to add a second page with the same title - should raise PageAlreadyExistsError
     expect(() => {
@@ -105,12 +150,6 @@ describe('UserDatabase', () => {
     }).toThrow(PageNotFoundError);
   });
 
-  test('deletePage should throw error when deleting non-existent page', () => {
-    expect(() => {
-      db.deletePage('non_existent_id');
-    }).toThrow(PageNotFoundError);
-  });
-
   test('addBlock should add a block to a page', () => {
     const pageId = db.addPage('Test Page');
     const blockId = db.addBlock('Test Block', 'text', { position: 1, pageId });
@@ -139,7 +178,7 @@ describe('UserDatabase', () => {
 
     expect(() => {
       db.addBlock('Test Block', 'text', { position: 1, pageId, parentBlockId });
-    }).toThrow(/A block must be associated with either a page_id or a parent_block_id, but not both/);
+    }).toThrow(BLOCK_PARENT_ERROR);
   });
 
   test('deleteBlock should delete a block', () => {
@@ -154,12 +193,6 @@ describe('UserDatabase', () => {
     }).toThrow(BlockNotFoundError);
   });
 
-  test('deleteBlock should throw error when deleting non-existent block', () => {
-    expect(() => {
-      db.deleteBlock('non_existent_id');
-    }).toThrow(BlockNotFoundError);
-  });
-
   test('deletePage should cascade delete its blocks', () => {
     const pageId = db.addPage('Test Page');
     const blockId = db.addBlock('Test Block', 'text', { position: 1, pageId });
@@ -197,12 +230,6 @@ describe('UserDatabase', () => {
     expect(updatedBlock.content).toBe('New Content');
   });
 
-  test('updateBlockContent should throw error when updating content of non-existent block', () => {
-    expect(() => {
-      db.updateBlockContent('non_existent_id', 'New Content');
-    }).toThrow(BlockNotFoundError);
-  });
-
   test('updateBlockParent should update a block\'s parent to a different page', () => {
     const pageId1 = db.addPage('Page One');
     const pageId2 = db.addPage('Page Two');
@@ -261,22 +288,18 @@ describe('UserDatabase', () => {
     expect(updatedBlock.parent_block_id).toBeNull();
   });
 
-  test('updateBlockParent should throw error when updating block parent with both page_id and parent_block_id', () => {
+  test.each([
+    { case: 'both page_id and parent_block_id', withPageId: true, withParentBlockId: true },
+    { case: 'neither page_id nor parent_block_id', withPageId: false, withParentBlockId: false },
+  ])('updateBlockParent should throw error when updating block parent with $case', ({ withPageId, withParentBlockId }) => {
     const pageId = db.addPage('Test Page');
     const blockId = db.addBlock('Test Block', 'text', { position: 1, pageId });
+    const newPageId = withPageId ? pageId : undefined;
+    const newParentBlockId = withParentBlockId ? blockId : undefined;
 
     expect(() => {
-      db.updateBlockParent(blockId, pageId, blockId);
-    }).toThrow(/A block must be associated with either a page_id or a parent_block_id, but not both/);
-  });
-
-  test('updateBlockParent should throw error when updating block parent with neither page_id nor parent_block_id', () => {
-    const pageId = db.addPage('Test Page');
-    const blockId = db.addBlock('Test Block', 'text', { position: 1, pageId });
-
-    expect(() => {
-      db.updateBlockParent(blockId);
-    }).toThrow(/A block must be associated with either a page_id or a parent_block_id, but not both/);
+      db.updateBlockParent(blockId, newPageId, newParentBlockId);
+    }).toThrow(BLOCK_PARENT_ERROR);
   });
 
   test('updateBlockParent should throw error when updating parent of non-existent block', () => {
@@ -297,6 +320,15 @@ describe('UserDatabase', () => {
     expect(workspace.color).toBe('#ff0000');
   });
 
+  test('addWorkspace should store a very long name', () => {
+    const longName = 'A'.repeat(500);
+    const workspaceId = db.addWorkspace(longName, '#ABCDEF');
+
+    const workspace = db.getWorkspaceById(workspaceId);
+    expect(workspace.name).toBe(longName);
+    expect(workspace.color).toBe('#abcdef');
+  });
+
   test('getWorkspaceById should retrieve a workspace by its ID', () => {
     const workspaceId = db.addWorkspace('Test Workspace', '#00FF00');
 
@@ -308,25 +340,21 @@ describe('UserDatabase', () => {
   });
 
   test('getAllWorkspaces should retrieve all workspaces', () => {
-    db.addWorkspace('Workspace 1', '#FF0000');
-    db.addWorkspace('Workspace 2', '#00FF00');
+    addTestWorkspaces(db, [
+      { name: 'Workspace 1', color: '#FF0000' },
+      { name: 'Workspace 2', color: '#00FF00' },
+    ]);
 
     const workspaces = db.getAllWorkspaces();
 
     // Should include the default workspace plus the two we added
     expect(workspaces).toHaveLength(3);
 
-    // Find the specific workspaces we added
-    const workspace1 = workspaces.find(w => w.name === 'Workspace 1');
-    const workspace2 = workspaces.find(w => w.name === 'Workspace 2');
+    // Index the workspaces by name once rather than scanning the list per lookup
+    const byName = new Map(workspaces.map(w => [w.name, w]));
 
-    expect(workspace1).toBeDefined();
-    expect(workspace1?.name).toBe('Workspace 1');
-    expect(workspace1?.color).toBe('#ff0000');
-
-    expect(workspace2).toBeDefined();
-    expect(workspace2?.name).toBe('Workspace 2');
-    expect(workspace2?.color).toBe('#00ff00');
+    expect(byName.get('Workspace 1')?.color).toBe('#ff0000');
+    expect(byName.get('Workspace 2')?.color).toBe('#00ff00');
   });
 
   test('updateWorkspace should update an existing workspace', () => {
@@ -341,12 +369,6 @@ describe('UserDatabase', () => {
     expect(updatedWorkspace.color).toBe('#0000ff');
   });
 
-  test('updateWorkspace should throw error when updating non-existent workspace', () => {
-    expect(() => {
-      db.updateWorkspace(999, 'New Title', '#0000FF');
-    }).toThrow(WorkspaceNotFoundError);
-  });
-
   test('deleteWorkspace should delete a workspace', () => {
     const workspaceId = db.addWorkspace('Test Workspace', '#FF0000');
 
@@ -358,31 +380,43 @@ describe('UserDatabase', () => {
     }).toThrow(WorkspaceNotFoundError);
   });
 
-  test('deleteWorkspace should throw error when deleting non-existent workspace', () => {
-    expect(() => {
-      db.deleteWorkspace(999);
-    }).toThrow(WorkspaceNotFoundError);
+  // Every mutation on a missing row reports it with the entity's not-found error
+  test.each([
+    { method: 'updatePageTitle', call: (database: UserDatabase) => database.updatePageTitle('non_existent_id', 'New Title'), error: PageNotFoundError },
+    { method: 'deletePage', call: (database: UserDatabase) => database.deletePage('non_existent_id'), error: PageNotFoundError },
+    { method: 'deleteBlock', call: (database: UserDatabase) => database.deleteBlock('non_existent_id'), error: BlockNotFoundError },
+    { method: 'updateBlockContent', call: (database: UserDatabase) => database.updateBlockContent('non_existent_id', 'New Content'), error: BlockNotFoundError },
+    { method: 'updateWorkspace', call: (database: UserDatabase) => database.updateWorkspace(999, 'New Title', '#0000FF'), error: WorkspaceNotFoundError },
+    { method: 'deleteWorkspace', call: (database: UserDatabase) => database.deleteWorkspace(999), error: WorkspaceNotFoundError },
+  ])('$method should throw error for a non-existent row', ({ call, error }) => {
+    expect(() => call(db)).toThrow(error);
   });
 }); // End of UserDatabase tests
 
 describe('UserDatabaseFTS', () => {
   let db: UserDatabase;
 
+  beforeAll(() => {
+    // One in-memory database is shared by every test in this block
+    db = createTestUserDatabase();
+  });
+
   beforeEach(() => {
-    // Create a new in-memory database for each test
-    db = new UserDatabase(':memory:');
+    // Each test runs inside a savepoint that is rolled back afterwards, leaving the database empty again
+    beginTestTransaction(db);
   });
 
   afterEach(() => {
-    // Close the database connection after each test
+    rollbackTestTransaction(db);
+  });
+
+  afterAll(() => {
     db.close();
   });
 
   test('searchPages should find pages with exact title match', () => {
     // Add some pages
-    const pageId1 = db.addPage('Introduction to Python');
-    const pageId2 = db.addPage('Advanced JavaScript');
-    const pageId3 = db.addPage('Machine Learning Basics');
+    const [pageId1, pageId2, pageId3] = addTestPages(db, ['Introduction to Python', 'Advanced JavaScript', 'Machine Learning Basics']);
 
     // Search for an exact match
     const results = db.searchPages('Python');
@@ -392,9 +426,7 @@ describe('UserDatabaseFTS', () => {
   });
 
   test('searchPages should find pages with partial title match', () => {
-    const pageId1 = db.addPage('Getting Started with Python');
-    const pageId2 = db.addPage('Advanced JavaScript');
-    const pageId3 = db.addPage('Python for Beginners');
+    const [pageId1, pageId2, pageId3] = addTestPages(db, ['Getting Started with Python', 'Advanced JavaScript', 'Python for Beginners']);
 
     // Search for pages containing "Python"
     const results = db.searchPages('Python');
@@ -405,9 +437,7 @@ describe('UserDatabaseFTS', () => {
   });
 
   test('searchPages should find pages with multiple search terms', () => {
-    const pageId1 = db.addPage('Introduction to Python Programming');
-    const pageId2 = db.addPage('Advanced JavaScript');
-    const pageId3 = db.addPage('Python Machine Learning');
+    const [pageId1, pageId2, pageId3] = addTestPages(db, ['Introduction to Python Programming', 'Advanced JavaScript', 'Python Machine Learning']);
 
     // Search for pages containing both "Python" and "Programming"
     const results = db.searchPages('Python Programming');
@@ -417,9 +447,7 @@ describe('UserDatabaseFTS', () => {
   });
 
   test('searchPages should work with phrase matching', () => {
-    const pageId1 = db.addPage('Introduction to Python Programming');
-    const pageId2 = db.addPage('Advanced Python Concepts');
-    const pageId3 = db.addPage('Python Programming Guide');
+    const [pageId1, pageId2, pageId3] = addTestPages(db, ['Introduction to Python Programming', 'Advanced Python Concepts', 'Python Programming Guide']);
 
     // Search for pages containing the exact phrase "Python Programming"
     const results = db.searchPages('"Python Programming"');
@@ -431,8 +459,7 @@ describe('UserDatabaseFTS', () => {
   });
 
   test('searchPages should return no results when nothing matches', () => {
-    db.addPage('Introduction to Python');
-    db.addPage('Advanced JavaScript');
+    addTestPages(db, ['Introduction to Python', 'Advanced JavaScript']);
 
     // Search for a term that doesn't exist
     const results = db.searchPages('Nonexistent');
@@ -441,9 +468,7 @@ describe('UserDatabaseFTS', () => {
 
   test('searchPages should work with limit parameter', () => {
     // Add several pages that match the search term
-    for (let i = 0; i < 15; i++) {
-      db.addPage(`Python Tutorial Part ${i}`);
-    }
+    addTestPages(db, Array.from({ length: 15 }, (_, i) => `Python Tutorial Part ${i}`));
 
     // Search with a limit of 5
     const results = db.searchPages('Python', 5);
@@ -451,8 +476,7 @@ describe('UserDatabaseFTS', () => {
   });
 
   test('searchPages should be case insensitive', () => {
-    const pageId1 = db.addPage('Introduction to Python');
-    db.addPage('Advanced JavaScript');
+    const [pageId1] = addTestPages(db, ['Introduction to Python', 'Advanced JavaScript']);
 
     // Search using different case
     let results = db.searchPages('python');
@@ -536,9 +560,7 @@ describe('UserDatabaseFTS', () => {
   test('searchBlocks should work with limit parameter', () => {
     const pageId = db.addPage('Test Page');
     // Add several blocks that match the search term
-    for (let i = 0; i < 15; i++) {
-      db.addBlock(`Python tutorial part ${i}`, 'text', { position: i + 1, pageId });
-    }
+    addTestBlocks(db, Array.from({ length: 15 }, (_, i) => ({ content: `Python tutorial part ${i}`, position: i + 1, pageId })));
 
     // Search with a limit of 5
     const results = db.searchBlocks('Python', 5);
@@ -581,8 +603,7 @@ describe('UserDatabaseFTS', () => {
   });
 
   test('searchAll should find both pages and blocks', () => {
-    const pageId1 = db.addPage('Python Tutorial');
-    const pageId2 = db.addPage('JavaScript Guide');
+    const [pageId1, pageId2] = addTestPages(db, ['Python Tutorial', 'JavaScript Guide']);
     const blockId1 = db.addBlock('Learning Python is fun', 'text', { position: 1, pageId: pageId1 });
     const blockId2 = db.addBlock('Advanced JavaScript concepts', 'text', { position: 2, pageId: pageId2 });
 
@@ -595,8 +616,7 @@ describe('UserDatabaseFTS', () => {
   });
 
   test('searchAll should work when query matches only pages', () => {
-    const pageId1 = db.addPage('Python Tutorial');
-    db.addPage('Java Guide');
+    const [pageId1] = addTestPages(db, ['Python Tutorial', 'Java Guide']);
     db.addBlock('Learning JavaScript is fun', 'text', { position: 1, pageId: pageId1 });
     db.addBlock('Advanced JavaScript concepts', 'text', { position: 2, pageId: pageId1 });
 
@@ -608,8 +628,7 @@ describe('UserDatabaseFTS', () => {
   });
 
   test('searchAll should work when query matches only blocks', () => {
-    const pageId1 = db.addPage('Tutorial');
-    db.addPage('Guide');
+    const [pageId1] = addTestPages(db, ['Tutorial', 'Guide']);
     const blockId1 = db.addBlock('Learning Python is fun', 'text', { position: 1, pageId: pageId1 });
     db.addBlock('Advanced JavaScript concepts', 'text', { position: 2, pageId: pageId1 });
 
@@ -738,8 +757,7 @@ describe('UserDatabaseFTS', () => {
   });
 
   test('search with empty query should return empty results', () => {
-    db.addPage('Python Tutorial');
-    const pageId = db.addPage('JavaScript Guide');
+    const [, pageId] = addTestPages(db, ['Python Tutorial', 'JavaScript Guide']);
     const blockId = db.addBlock('Learning Python is fun', 'text', { position: 1, pageId });
 
     // Empty search should return empty results
@@ -749,12 +767,9 @@ describe('UserDatabaseFTS', () => {
   });
 
   test('searchAll should work with limit parameter', () => {
-    const page1_id = db.addPage('Python Introduction');
-    const page2_id = db.addPage('Python Advanced Topics');
+    const [page1_id, page2_id] = addTestPages(db, ['Python Introduction', 'Python Advanced Topics']);
 
-    for (let i = 0; i < 10; i++) {
-      db.addBlock(`Python concept ${i}`, 'text', { position: i + 1, pageId: page1_id });
-    }
+    addTestBlocks(db, Array.from({ length: 10 }, (_, i) => ({ content: `Python concept ${i}`, position: i + 1, pageId: page1_id })));
 
     // Search with limit - should apply separately to pages and blocks
     const [pages, blocks] = db.searchAll('Python', 3);
@@ -766,9 +781,7 @@ describe('UserDatabaseFTS', () => {
   });
 
   test('search with wildcards should work if supported', () => {
-    const page1_id = db.addPage('Python Programming');
-    const page2_id = db.addPage('JavaScript Programming');
-    db.addPage('Java Programming');
+    const [page1_id, page2_id] = addTestPages(db, ['Python Programming', 'JavaScript Programming', 'Java Programming']);
 
     // Test if wildcard search works (would depend on FTS configuration)
     // Standard FTS5 doesn't support * wildcards directly in MATCH
@@ -779,9 +792,7 @@ describe('UserDatabaseFTS', () => {
   });
 
   test('search results should be properly ranked by relevance', () => {
-    const page1_id = db.addPage('Python for Beginners: Introduction to Python Programming');
-    const page2_id = db.addPage('Advanced Python Techniques');
-    const page3_id = db.addPage('Random Title');
+    const [page1_id, page2_id, page3_id] = addTestPages(db, ['Python for Beginners: Introduction to Python Programming', 'Advanced Python Techniques', 'Random Title']);
 
     // Search for "Python" - expect pages with more occurrences to rank higher
     const results = db.searchPages('Python', 10);
@@ -801,9 +812,7 @@ describe('UserDatabaseFTS', () => {
   });
 
   test('search with boolean operators when escape_special_chars is false', () => {
-    const page1_id = db.addPage('Python Tutorial');
-    const page2_id = db.addPage('JavaScript Tutorial');
-    const page3_id = db.addPage('Python and JavaScript Guide');
+    const [page1_id, page2_id, page3_id] = addTestPages(db, ['Python Tutorial', 'JavaScript Tutorial', 'Python and JavaScript Guide']);
 
     // Search with OR operator - should find pages containing either Python or JavaScript
     const results_or = db.searchPages('Python OR JavaScript', 10, false);
@@ -1,60 +1,73 @@
 import { beforeEach, afterEach, describe, expect, test, vi, beforeAll, afterAll } from 'vitest';
-import request from 'supertest';
 import path from 'path';
 import os from 'os';
 import fs from 'fs';
-import { app } from '../../../src/app'; // Adjust this import path as needed
 import { SystemDatabase } from '../../../src/database/system';
 import { UserDatabase } from '../../../src/database/user';
-import { setupTestSystemDatabase, teardownTestSystemDatabase, DbTestSetup } from '../test-utils/db-test-setup';
+import {
+  setupTestSystemDatabase,
+  teardownTestSystemDatabase,
+  setupTestUserDatabase,
+  teardownTestUserDatabase,
+  beginTestTransaction,
+  rollbackTestTransaction,
+  addTestBlocks,
+  DbTestSetup
+} from '../test-utils/db-test-setup';
+import { BlockCreateSchema } from '../../../src/routes/requests';
+import { setupTestApi, teardownTestApi, ApiTestSetup, NotFoundCase } from '../test-utils/api-test-setup';
+
+// The block most tests start from, added to the shared test page
+const TEST_BLOCK = { content: 'Test Block', type: 'text', position: 1 };
+
+function addTestBlock(db: UserDatabase, pageId: string): string {
+  return db.addBlock(TEST_BLOCK.content, TEST_BLOCK.type, { position: TEST_BLOCK.position, pageId });
+}
 
 describe('Block API Routes', () => {
   let sysDb: SystemDatabase;
   let testSetup: DbTestSetup;
   let testDb: UserDatabase;
   let testDatabaseId: string;
-  let testDbNum = 0;
+  let testPageId: string;
+  let apiSetup: ApiTestSetup;
+  let api: ApiTestSetup['api'];
 
-  beforeAll(() => {
+  beforeAll(async () => {
     // Initialize system database
     testSetup = setupTestSystemDatabase();
     sysDb = testSetup.sysDb;
-  })
 
-  beforeEach(() => {
-    // Add the test database and capture its ID
-    let userDbName = `test_db_${testDbNum}`;
-    testDbNum += 1;
-    sysDb.addUserDatabase(userDbName);
-    const dbInfo = sysDb.getUserDatabaseByName(userDbName);
-    if (dbInfo) {
-      testDatabaseId = dbInfo.id;
-    }
+    // One HTTP server is shared by every test in this file
+    apiSetup = setupTestApi();
+    api = apiSetup.api;
 
-    // Create user database
-    testDb = new UserDatabase(dbInfo.path);
-  });
+    // One user database is shared by every test in this file, on the same connection the routes use
+    ({ testDatabaseId, testDb } = await setupTestUserDatabase(sysDb, 'test_db'));
 
-  afterEach(async () => {
-    testDb.close();
+    // Almost every test needs a page to hold its blocks; it is created once, outside the per-test savepoints
+    testPageId = testDb.addPage('Test Page');
+  });
 
-    // Delete the test database from system DB
-    if (testDatabaseId) {
-      const dbInfo = sysDb.getUserDatabaseById(testDatabaseId);
-      await sysDb.deleteUserDatabase(testDatabaseId);
-    }
+  beforeEach(() => {
+    // Each test runs inside a savepoint that is rolled back afterwards, leaving only the shared page behind
+    beginTestTransaction(testDb);
+  });
 
+  afterEach(() => {
+    rollbackTestTransaction(testDb);
   });
 
-  afterAll(() => {
+  afterAll(async () => {
+    await teardownTestApi(apiSetup);
+    await teardownTestUserDatabase(sysDb, testDatabaseId);
     teardownTestSystemDatabase(testSetup);
   });
 
   test('should add a block successfully', async () => {
-    // Create a page first
-    const pageId = testDb.addPage('Test Page');
+    const pageId = testPageId;
 
-    const response = await request(app)
+    const response = await api
       .post(`/db/${testDatabaseId}/blocks`)
       .send({
         content: 'Test Block',
@@ -80,38 +93,46 @@ describe('Block API Routes', () => {
   });
 
   test('should get a block by ID successfully', async () => {
-    // Create a page and block first
-    const pageId = testDb.addPage('Test Page');
-    const blockId = testDb.addBlock('Test Block', 'text', { position: 1, pageId: pageId });
+    // Create a block first
+    const pageId = testPageId;
+    const blockId = addTestBlock(testDb, pageId);
 
-    const response = await request(app)
+    const response = await api
       .get(`/db/${testDatabaseId}/block/${blockId}`)
       .expect(200);
 
     const responseData = response.body;
     expect(responseData.block_id).toBe(blockId);
-    expect(responseData.content).toBe('Test Block');
+    expect(responseData.content).toBe(TEST_BLOCK.content);
     expect(responseData.page_id).toBe(pageId);
     expect(responseData.parent_block_id).toBeNull();
-    expect(responseData.position).toBe(1);
+    expect(responseData.position).toBe(TEST_BLOCK.position);
     expect(responseData.created_at).toBeDefined();
   });
 
-  test('should return 404 when getting a non-existent block', async () => {
-    const response = await request(app)
-      .get(`/db/${testDatabaseId}/block/xyz999`)
-      .expect(404);
+  // Every route that takes a block ID answers a missing block with the same 404
+  const blockNotFoundCases: NotFoundCase[] = [
+    { method: 'get', path: '/block/xyz999' },
+    { method: 'put', path: '/blocks/content', body: { block_id: 'xyz999', new_content: 'Updated Content' } },
+    { method: 'delete', path: '/blocks/xyz999' },
+  ];
+
+  test.each(blockNotFoundCases)('should return 404 for $method $path with a non-existent block', async ({ method, path, body }) => {
+    const pending = api[method](`/db/${testDatabaseId}${path}`);
+    const response = await (body ? pending.send(body) : pending).expect(404);
 
     expect(response.body).toEqual({ error: 'Block with ID xyz999 not found' });
   });
 
   test('should get all blocks for a page successfully', async () => {
-    // Create a page and some blocks that are directly associated with the page
-    const pageId = testDb.addPage('Test Page');
-    const block1Id = testDb.addBlock('Block 1', 'text', { position: 1, pageId: pageId });
-    const block2Id = testDb.addBlock('Block 2', 'text', { position: 2, pageId: pageId });
-
-    const response = await request(app)
+    // Create some blocks that are directly associated with the shared page
+    const pageId = testPageId;
+    const [block1Id, block2Id] = addTestBlocks(testDb, [
+      { content: 'Block 1', position: 1, pageId: pageId },
+      { content: 'Block 2', position: 2, pageId: pageId },
+    ]);
+
+    const response = await api
       .get(`/db/${testDatabaseId}/blocks/${pageId}`)
       .expect(200);
 
@@ -119,36 +140,30 @@ describe('Block API Routes', () => {
     expect(Array.isArray(blocks)).toBe(true);
     expect(blocks).toHaveLength(2);
 
-    // Verify both blocks are present
-    const blockIds = blocks.map((block: any) => block.block_id);
-    expect(blockIds).toContain(block1Id);
-    expect(blockIds).toContain(block2Id);
-
-    // Verify block details
-    for (const block of blocks) {
-      if (block.block_id === block1Id) {
-        expect(block.content).toBe('Block 1');
-        expect(block.position).toBe(1);
-        expect(block.page_id).toBe(pageId);
-      } else if (block.block_id === block2Id) {
-        expect(block.content).toBe('Block 2');
-        expect(block.position).toBe(2);
-        expect(block.page_id).toBe(pageId);
-      }
-    }
+    // Verify both blocks are present with their details
+    const actual = new Set(blocks.map((block: any) => ({
+      block_id: block.block_id,
+      content: block.content,
+      position: block.position,
+      page_id: block.page_id
+    })));
+    expect(actual).toEqual(new Set([
+      { block_id: block1Id, content: 'Block 1', position: 1, page_id: pageId },
+      { block_id: block2Id, content: 'Block 2', position: 2, page_id: pageId },
+    ]));
   });
 
-  test('should update block content successfully', async () => {
-    // Create a page and block first
-    const pageId = testDb.addPage('Test Page');
+  test.each([
+    { case: 'plain text', new_content: 'Updated Content' },
+    { case: 'special characters', new_content: 'Special chars: !@#$%^&*()_+-={}|\\:"\'<>?,./' },
+  ])('should update block content with $case', async ({ new_content }) => {
+    // Create a block first
+    const pageId = testPageId;
     const blockId = testDb.addBlock('Original Content', 'text', { position: 1, pageId: pageId });
 
-    const response = await request(app)
+    const response = await api
       .put(`/db/${testDatabaseId}/blocks/content`)
-      .send({
-        block_id: blockId,
-        new_content: 'Updated Content'
-      })
+      .send({ block_id: blockId, new_content })
       .expect(200);
 
     expect(response.body).toEqual({ status: 'success' });
@@ -156,28 +171,16 @@ describe('Block API Routes', () => {
     // Verify the block content was updated in the database
     const blockData = testDb.getBlockById(blockId);
     expect(blockData).toBeDefined();
-    expect(blockData.content).toBe('Updated Content');
-  });
-
-  test('should return 404 when updating content of a non-existent block', async () => {
-    const response = await request(app)
-      .put(`/db/${testDatabaseId}/blocks/content`)
-      .send({
-        block_id: 'xyz999',
-        new_content: 'Updated Content'
-      })
-      .expect(404);
-
-    expect(response.body).toEqual({ error: 'Block with ID xyz999 not found' });
+    expect(blockData.content).toBe(new_content);
   });
 
   test('should update block parent successfully', async () => {
-    // Create a page and two blocks first
-    const pageId = testDb.addPage('Test Page');
-    const blockId = testDb.addBlock('Test Block', 'text', { position: 1, pageId: pageId });
+    // Create a block and a second page to move it to
+    const pageId = testPageId;
+    const blockId = addTestBlock(testDb, pageId);
     const newPageId = testDb.addPage('New Page');
 
-    const response = await request(app)
+    const response = await api
       .put(`/db/${testDatabaseId}/blocks/parent`)
       .send({
         block_id: blockId,
@@ -195,11 +198,11 @@ describe('Block API Routes', () => {
   });
 
   test('should delete a block successfully', async () => {
-    // Create a page and block first
-    const pageId = testDb.addPage('Test Page');
-    const blockId = testDb.addBlock('Test Block', 'text', { position: 1, pageId: pageId });
+    // Create a block first
+    const pageId = testPageId;
+    const blockId = addTestBlock(testDb, pageId);
 
-    const response = await request(app)
+    const response = await api
       .delete(`/db/${testDatabaseId}/blocks/${blockId}`)
       .expect(200);
 
@@ -216,54 +219,24 @@ describe('Block API Routes', () => {
     }
   });
 
-  test('should return 404 when deleting a non-existent block', async () => {
-    const response = await request(app)
-      .delete(`/db/${testDatabaseId}/blocks/xyz999`)
-      .expect(404);
-
-    expect(response.body).toEqual({ error: 'Block with ID xyz999 not found' });
-  });
-
   test('should get blocks for a page when there are no blocks', async () => {
-    // Create a page but no blocks
-    const pageId = testDb.addPage('Test Page');
+    // The shared page has no blocks
+    const pageId = testPageId;
 
-    const response = await request(app)
+    const response = await api
       .get(`/db/${testDatabaseId}/blocks/${pageId}`)
       .expect(200);
 
     expect(response.body).toEqual([]);
   });
 
-  test('should update block content with special characters', async () => {
-    // Create a page and block first
-    const pageId = testDb.addPage('Test Page');
-    const blockId = testDb.addBlock('Original Content', 'text', { position: 1, pageId: pageId });
-
-    const specialContent = 'Special chars: !@#$%^&*()_+-={}|\\:"\'<>?,./';
-    const response = await request(app)
-      .put(`/db/${testDatabaseId}/blocks/content`)
-      .send({
-        block_id: blockId,
-        new_content: specialContent
-      })
-      .expect(200);
-
-    expect(response.body).toEqual({ status: 'success' });
-
-    // Verify the block content was updated in the database
-    const blockData = testDb.getBlockById(blockId);
-    expect(blockData).toBeDefined();
-    expect(blockData.content).toBe(specialContent);
-  });
-
   test('should add a block with parent successfully', async () => {
-    // Create a page and parent block first
-    const pageId = testDb.addPage('Test Page');
+    // Create a parent block first
+    const pageId = testPageId;
     const parentBlockId = testDb.addBlock('Parent Block', 'text', { position: 1, pageId: pageId });
 
     // First add the child block to the page
-    let response = await request(app)
+    let response = await api
       .post(`/db/${testDatabaseId}/blocks`)
       .send({
         content: 'Child Block',
@@ -288,7 +261,7 @@ describe('Block API Routes', () => {
     expect(blockData.position).toBe(2);
 
     // Now update the block's parent to be the parent_block
-    response = await request(app)
+    response = await api
       .put(`/db/${testDatabaseId}/blocks/parent`)
       .send({
         block_id: blockId,
@@ -305,4 +278,42 @@ describe('Block API Routes', () => {
     expect(blockData.page_id).toBeNull(); // Should no longer be directly associated with page
     expect(blockData.parent_block_id).toBe(parentBlockId); // Should have the correct parent
   });
+
+  test('should reject a block body that is not a JSON object', async () => {
+    const response = await api
+      .post(`/db/${testDatabaseId}/blocks`)
+      .send(['Test Block'])
+      .expect(400);
+
+    expect(response.body.error).toBe('Content, position, and page_id are required');
+  });
+
+  // Without a JSON content type nothing is parsed and req.body is undefined
+  test.each([
+    { path: '/blocks/content', error: 'block_id and new_content are required' },
+    { path: '/blocks/position', error: 'block_id and new_position are required' },
+    { path: '/blocks/parent', error: 'block_id is required' },
+  ])('PUT $path should reject a request without a JSON body', async ({ path, error }) => {
+    const response = await api
+      .put(`/db/${testDatabaseId}${path}`)
+      .type('text')
+      .send('xyz999')
+      .expect(400);
+
+    expect(response.body.error).toBe(error);
+  });
+
+  describe('request validation', () => {
+    test('should default the block type to text', () => {
+      const result = BlockCreateSchema.safeParse({ content: 'Block', position: 0, page_id: 'abc' });
+      expect(result.success).toBe(true);
+      expect(result.data?.type).toBe('text');
+    });
+
+    test('should reject a block without a page_id', () => {
+      const result = BlockCreateSchema.safeParse({ content: 'Block', position: 0 });
+      expect(result.success).toBe(false);
+      expect(result.error?.issues[0].message).toBe('Content, position, and page_id are required');
+    });
+  });
 });
@@ -1,16 +1,34 @@
-import { beforeEach, afterEach, describe, expect, test, vi, beforeAll } from 'vitest';
-import request from 'supertest';
-import { app } from '../../../src/app'; // Adjust this import path as needed
+import { beforeEach, afterEach, describe, expect, test, vi, beforeAll, afterAll } from 'vitest';
+import fs from 'fs';
+import { Response } from 'supertest';
 import { SystemDatabase } from '../../../src/database/system';
 import { UserDatabase } from '../../../src/database/user';
-import { UserDatabaseInfo } from '../../../src/database/entities';
+import { Page, UserDatabaseInfo } from '../../../src/database/entities';
+import { getUserDatabase, UserDatabaseProvider } from '../../../src/database/system.provider';
 import { setupTestSystemDatabase, teardownTestSystemDatabase, DbTestSetup } from '../test-utils/db-test-setup';
-import { SystemDatabaseProvider } from '../../../src/database/system.provider';
+import { setupTestApi, teardownTestApi, ApiTestSetup } from '../test-utils/api-test-setup';
+
+// Request bodies shared by several tests, serialized once rather than per request
+const EMPTY_BODY = '{}';
+const NEW_NAME_BODY = JSON.stringify({ name: 'new_name' });
 
 
 describe('Database API Routes', () => {
   let sysDb: SystemDatabase;
   let testSetup: DbTestSetup;
+  let apiSetup: ApiTestSetup;
+  let api: ApiTestSetup['api'];
+
+  beforeAll(() => {
+    // One HTTP server is shared by every test in this file.
+    // The pages router is mounted too, to send requests into a database while its file is renamed or deleted.
+    apiSetup = setupTestApi();
+    api = apiSetup.api;
+  });
+
+  afterAll(async () => {
+    await teardownTestApi(apiSetup);
+  });
 
   beforeEach(() => {
     // Initialize system database
@@ -20,15 +38,11 @@ describe('Database API Routes', () => {
 
   afterEach(() => {
     teardownTestSystemDatabase(testSetup);
-
-    // Force provider for routes to make a new instance next time
-    // Needed since each test has a different SYSTEM_DB_PATH
-    SystemDatabaseProvider.closeInstance();
   });
 
 
   test('should get an empty list when no databases exist', async () => {
-    const response = await request(app)
+    const response = await api
       .get('/databases')
       .expect(200);
 
@@ -38,10 +52,9 @@ describe('Database API Routes', () => {
 
   test('should get a list of databases when they exist', async () => {
     // Add some databases first
-    sysDb.addUserDatabase('db1');
-    sysDb.addUserDatabase('db2');
+    await Promise.all([sysDb.addUserDatabase('db1'), sysDb.addUserDatabase('db2')]);
 
-    const response = await request(app)
+    const response = await api
       .get('/databases')
       .expect(200);
 
@@ -54,7 +67,7 @@ describe('Database API Routes', () => {
   });
 
   test('should create a database successfully', async () => {
-    const response = await request(app)
+    const response = await api
       .post('/databases')
       .send({ name: 'new_db' })
       .expect(200);
@@ -72,9 +85,10 @@ describe('Database API Routes', () => {
   });
 
   test('should return 400 when creating a database without a name', async () => {
-    const response = await request(app)
+    const response = await api
       .post('/databases')
-      .send({})
+      .type('json')
+      .send(EMPTY_BODY)
       .expect(400);
 
     expect(response.body).toEqual({ error: 'Name is required' });
@@ -82,9 +96,9 @@ describe('Database API Routes', () => {
 
   test('should return 409 when creating a database that already exists', async () => {
     // Create a database first
-    sysDb.addUserDatabase('existing_db');
+    await sysDb.addUserDatabase('existing_db');
 
-    const response = await request(app)
+    const response = await api
       .post('/databases')
       .send({ name: 'existing_db' })
       .expect(409);
@@ -97,7 +111,7 @@ describe('Database API Routes', () => {
     const newDb = await sysDb.addUserDatabase('test_db');
     const dbId = newDb.id;
 
-    const response = await request(app)
+    const response = await api
       .get(`/databases/${dbId}`)
       .expect(200);
 
@@ -109,7 +123,7 @@ describe('Database API Routes', () => {
   });
 
   test('should return 404 when getting a database that does not exist', async () => {
-    const response = await request(app)
+    const response = await api
       .get('/databases/non_existent_id')
       .expect(404);
 
@@ -121,9 +135,10 @@ describe('Database API Routes', () => {
     const newDb = await sysDb.addUserDatabase('old_name');
     const dbId = newDb.id;
 
-    const response = await request(app)
+    const response = await api
       .put(`/databases/${dbId}`)
-      .send({ name: 'new_name' })
+      .type('json')
+      .send(NEW_NAME_BODY)
       .expect(200);
 
     expect(response.body).toEqual({ message: 'Database updated successfully' });
@@ -138,18 +153,20 @@ describe('Database API Routes', () => {
     const newDb = await sysDb.addUserDatabase('test_db');
     const dbId = newDb.id;
 
-    const response = await request(app)
+    const response = await api
       .put(`/databases/${dbId}`)
-      .send({})
+      .type('json')
+      .send(EMPTY_BODY)
       .expect(400);
 
     expect(response.body).toEqual({ error: 'Name is required' });
   });
 
   test('should return 404 when updating a database that does not exist', async () => {
-    const response = await request(app)
+    const response = await api
       .put('/databases/non_existent_id')
-      .send({ name: 'new_name' })
+      .type('json')
+      .send(NEW_NAME_BODY)
       .expect(404);
 
     expect(response.body.error).toContain('not found');
@@ -157,11 +174,10 @@ describe('Database API Routes', () => {
 
   test('should return 409 when updating a database with a name that already exists', async () => {
     // Create two databases
-    const db1 = await sysDb.addUserDatabase('db1');
-    const db2 = await sysDb.addUserDatabase('db2');
+    const [db1, db2] = await Promise.all([sysDb.addUserDatabase('db1'), sysDb.addUserDatabase('db2')]);
     const db1Id = db1.id;
 
-    const response = await request(app)
+    const response = await api
       .put(`/databases/${db1Id}`)
       .send({ name: 'db2' }) // Try to rename db1 to db2's name
       .expect(409);
@@ -179,7 +195,7 @@ describe('Database API Routes', () => {
     // (should be handled gracefully, this is just to prevent output in stderr)
     newDbInstance.addPage('Test')
 
-    const response = await request(app)
+    const response = await api
       .delete(`/databases/${dbId}`)
       .expect(200);
 
@@ -197,10 +213,64 @@ describe('Database API Routes', () => {
   });
 
   test('should return 404 when deleting a database that does not exist', async () => {
-    const response = await request(app)
+    const response = await api
       .delete('/databases/non_existent_id')
       .expect(404);
 
     expect(response.body.error).toContain('not found');
   });
+
+  test('should not open a database while its file is being renamed', async () => {
+    const newDb = await sysDb.addUserDatabase('old_name');
+    getUserDatabase(newDb.id).addPage('Kept Page');
+
+    // Send a request into the database between the path update and the file rename
+    const rename = fs.promises.rename;
+    let interleaved: Response | undefined;
+    const renameSpy = vi.spyOn(fs.promises, 'rename').mockImplementation(async (oldPath, newPath) => {
+      interleaved = await api.get(`/db/${newDb.id}/pages`);
+      return rename(oldPath, newPath);
+    });
+    try {
+      await api
+        .put(`/databases/${newDb.id}`)
+        .type('json')
+        .send(NEW_NAME_BODY)
+        .expect(200);
+    } finally {
+      renameSpy.mockRestore();
+    }
+
+    expect(interleaved?.status).toBe(409);
+
+    // The renamed file still holds the page, rather than an empty database created at the new path
+    const response = await api
+      .get(`/db/${newDb.id}/pages`)
+      .expect(200);
+    expect(response.body.map((page: Page) => page.title)).toEqual(['Kept Page']);
+  });
+
+  test('should not reopen a database while its file is being deleted', async () => {
+    const newDb = await sysDb.addUserDatabase('to_delete');
+    getUserDatabase(newDb.id).addPage('Test');
+
+    // Send a request into the database just before its file is removed
+    const unlink = fs.promises.unlink;
+    let interleaved: Response | undefined;
+    const unlinkSpy = vi.spyOn(fs.promises, 'unlink').mockImplementation(async (filePath) => {
+      interleaved = await api.get(`/db/${newDb.id}/pages`);
+      return unlink(filePath);
+    });
+    try {
+      await api
+        .delete(`/databases/${newDb.id}`)
+        .expect(200);
+    } finally {
+      unlinkSpy.mockRestore();
+    }
+
+    expect(interleaved?.status).toBe(409);
+    expect(fs.existsSync(newDb.path)).toBe(false);
+    expect(UserDatabaseProvider['instances'].has(newDb.id)).toBe(false);
+  });
 });
@@ -1,57 +1,60 @@
 import { beforeEach, afterEach, describe, expect, test, vi, beforeAll, afterAll } from 'vitest';
-import request from 'supertest';
 import path from 'path';
 import os from 'os';
 import fs from 'fs';
-import { app } from '../../../src/app'; // Adjust this import path as needed
 import { SystemDatabase } from '../../../src/database/system';
 import { UserDatabase } from '../../../src/database/user';
-import { setupTestSystemDatabase, teardownTestSystemDatabase, DbTestSetup } from '../test-utils/db-test-setup';
+import {
+  setupTestSystemDatabase,
+  teardownTestSystemDatabase,
+  setupTestUserDatabase,
+  teardownTestUserDatabase,
+  beginTestTransaction,
+  rollbackTestTransaction,
+  addTestPages,
+  DbTestSetup
+} from '../test-utils/db-test-setup';
+import { PageCreateSchema } from '../../../src/routes/requests';
+import { setupTestApi, teardownTestApi, ApiTestSetup, NotFoundCase } from '../test-utils/api-test-setup';
 
 describe('Page API Routes', () => {
   let sysDb: SystemDatabase;
   let testSetup: DbTestSetup;
   let testDb: UserDatabase;
   let testDatabaseId: string;
-  let testDbNum = 0;
+  let apiSetup: ApiTestSetup;
+  let api: ApiTestSetup['api'];
 
-  beforeAll(() => {
+  beforeAll(async () => {
     // Initialize system database
     testSetup = setupTestSystemDatabase();
     sysDb = testSetup.sysDb;
-  })
 
-  beforeEach(() => {
-    // Add the test database and capture its ID
-    let userDbName = `test_db_${testDbNum}`;
-    testDbNum += 1;
-    sysDb.addUserDatabase(userDbName);
-    const dbInfo = sysDb.getUserDatabaseByName(userDbName);
-    if (dbInfo) {
-      testDatabaseId = dbInfo.id;
-    }
+    // One HTTP server is shared by every test in this file
+    apiSetup = setupTestApi();
+    api = apiSetup.api;
 
-    // Create user database
-    testDb = new UserDatabase(dbInfo.path);
+    // One user database is shared by every test in this file, on the same connection the routes use
+    ({ testDatabaseId, testDb } = await setupTestUserDatabase(sysDb, 'test_db'));
   });
 
-  afterEach(async () => {
-    testDb.close();
-
-    // Delete the test database from system DB
-    if (testDatabaseId) {
-      const dbInfo = sysDb.getUserDatabaseById(testDatabaseId);
-      await sysDb.deleteUserDatabase(testDatabaseId);
-    }
+  beforeEach(() => {
+    // Each test runs inside a savepoint that is rolled back afterwards, leaving the database empty again
+    beginTestTransaction(testDb);
+  });
 
+  afterEach(() => {
+    rollbackTestTransaction(testDb);
   });
 
-  afterAll(() => {
+  afterAll(async () => {
+    await teardownTestApi(apiSetup);
+    await teardownTestUserDatabase(sysDb, testDatabaseId);
     teardownTestSystemDatabase(testSetup);
   });
 
   test('should add a page successfully', async () => {
-    const response = await request(app)
+    const response = await api
       .post(`/db/${testDatabaseId}/pages`)
       .send({ title: 'Test Page' })
       .expect(200);
@@ -71,7 +74,7 @@ describe('Page API Routes', () => {
     // Create a page first
     const pageId = testDb.addPage('Test Page');
 
-    const response = await request(app)
+    const response = await api
       .get(`/db/${testDatabaseId}/pages/${pageId}`)
       .expect(200);
 
@@ -81,20 +84,25 @@ describe('Page API Routes', () => {
     expect(responseData.created_at).toBeDefined();
   });
 
-  test('should return 404 when getting a non-existent page', async () => {
-    const response = await request(app)
-      .get(`/db/${testDatabaseId}/pages/xyz999`)
-      .expect(404);
+  // Every route that takes a page ID answers a missing page with the same 404
+  const pageNotFoundCases: NotFoundCase[] = [
+    { method: 'get', path: '/pages/xyz999' },
+    { method: 'put', path: '/pages', body: { page_id: 'xyz999', new_title: 'New Title' } },
+    { method: 'delete', path: '/pages/xyz999' },
+  ];
+
+  test.each(pageNotFoundCases)('should return 404 for $method $path with a non-existent page', async ({ method, path, body }) => {
+    const pending = api[method](`/db/${testDatabaseId}${path}`);
+    const response = await (body ? pending.send(body) : pending).expect(404);
 
     expect(response.body).toEqual({ error: 'Page with ID xyz999 not found' });
   });
 
   test('should get all pages successfully', async () => {
     // Create some pages
-    const pageId1 = testDb.addPage('Page 1');
-    const pageId2 = testDb.addPage('Page 2');
+    const [pageId1, pageId2] = addTestPages(testDb, ['Page 1', 'Page 2']);
 
-    const response = await request(app)
+    const response = await api
       .get(`/db/${testDatabaseId}/pages`)
       .expect(200);
 
@@ -102,20 +110,18 @@ describe('Page API Routes', () => {
     expect(Array.isArray(pages)).toBe(true);
     expect(pages).toHaveLength(2);
 
-    const pageIds = pages.map((page: any) => page.page_id);
-    expect(pageIds).toContain(pageId1);
-    expect(pageIds).toContain(pageId2);
-
-    const titles = pages.map((page: any) => page.title);
-    expect(titles).toContain('Page 1');
-    expect(titles).toContain('Page 2');
+    const actual = new Set(pages.map((page: any) => ({ page_id: page.page_id, title: page.title })));
+    expect(actual).toEqual(new Set([
+      { page_id: pageId1, title: 'Page 1' },
+      { page_id: pageId2, title: 'Page 2' },
+    ]));
   });
 
   test('should rename a page successfully', async () => {
     // Create a page first
     const pageId = testDb.addPage('Old Title');
 
-    const response = await request(app)
+    const response = await api
       .put(`/db/${testDatabaseId}/pages`)
       .send({
         page_id: pageId,
@@ -131,23 +137,11 @@ describe('Page API Routes', () => {
     expect(pageData?.title).toBe('New Title');
   });
 
-  test('should return 404 when renaming a non-existent page', async () => {
-    const response = await request(app)
-      .put(`/db/${testDatabaseId}/pages`)
-      .send({
-        page_id: 'xyz999',
-        new_title: 'New Title'
-      })
-      .expect(404);
-
-    expect(response.body.error).toContain('Page with ID xyz999 not found');
-  });
-
   test('should delete a page successfully', async () => {
     // Create a page first
     const pageId = testDb.addPage('Test Page');
 
-    const response = await request(app)
+    const response = await api
       .delete(`/db/${testDatabaseId}/pages/${pageId}`)
       .expect(200);
 
@@ -164,27 +158,61 @@ describe('Page API Routes', () => {
     }
   });
 
-  test('should return 404 when deleting a non-existent page', async () => {
-    const response = await request(app)
-      .delete(`/db/${testDatabaseId}/pages/xyz999`)
-      .expect(404);
-
-    expect(response.body).toEqual({ error: 'Page with ID xyz999 not found' });
-  });
-
   // Additional edge case tests for pages
   test('should not add a page with an empty title', async () => {
-    const response = await request(app)
+    const response = await api
       .post(`/db/${testDatabaseId}/pages`)
       .send({ title: '' })
       .expect(400);
   });
 
+  test('should reject a page body that is not a JSON object', async () => {
+    const arrayResponse = await api
+      .post(`/db/${testDatabaseId}/pages`)
+      .send(['Test Page'])
+      .expect(400);
+    expect(arrayResponse.body.error).toBe('Title is required');
+
+    // Without a JSON content type nothing is parsed and req.body is undefined
+    const textResponse = await api
+      .post(`/db/${testDatabaseId}/pages`)
+      .type('text')
+      .send('Test Page')
+      .expect(400);
+    expect(textResponse.body.error).toBe('Title is required');
+  });
+
+  test('should reject a rename without a JSON body', async () => {
+    const response = await api
+      .put(`/db/${testDatabaseId}/pages`)
+      .type('text')
+      .send('New Title')
+      .expect(400);
+
+    expect(response.body.error).toBe('page_id and new_title are required');
+  });
+
   test('should get all pages when there are no pages', async () => {
-    const response = await request(app)
+    const response = await api
       .get(`/db/${testDatabaseId}/pages`)
       .expect(200);
 
     expect(response.body).toEqual([]);
   });
+
+  describe('request validation', () => {
+    test('should reject a missing title', () => {
+      const result = PageCreateSchema.safeParse({});
+      expect(result.success).toBe(false);
+      expect(result.error?.issues[0].message).toBe('Title is required');
+    });
+
+    test('should accept a very long title', () => {
+      const title = 'A'.repeat(1000);
+
+      const result = PageCreateSchema.safeParse({ title });
+      expect(result.success).toBe(true);
+      expect(result.data?.title).toBe(title);
+    });
+  });
 });
@@ -0,0 +1,33 @@
+import http from 'http';
+import request from 'supertest';
+import { app } from '../../../src/app';
+
+export interface ApiTestSetup {
+  server: http.Server;
+  api: ReturnType<typeof request>;
+}
+
+/**
+ * Start the app once per test file on an ephemeral port.
+ * Passing the app itself to supertest would start and stop a new HTTP server for every request.
+ */
+export function setupTestApi(): ApiTestSetup {
+  const server = app.listen(0);
+  return { server, api: request(server) };
+}
+
+export function teardownTestApi(setup: ApiTestSetup): Promise<void> {
+  return new Promise((resolve, reject) => {
+    setup.server.close(error => error ? reject(error) : resolve());
+  });
+}
+
+/**
+ * A request against a missing resource, for table-driven 404 tests.
+ * `path` is relative to `/db/:db_id`.
+ */
+export interface NotFoundCase {
+  method: 'get' | 'put' | 'delete';
+  path: string;
+  body?: object;
+}
@@ -1,26 +1,166 @@
 import * as fs from 'fs';
 import * as path from 'path';
 import * as os from 'os';
-import { vi } from 'vitest';
+import BetterSqlite3 from 'better-sqlite3';
 import { SystemDatabase } from '../../../src/database/system';
+import { UserDatabase } from '../../../src/database/user';
+import { getUserDatabase, SystemDatabaseProvider, UserDatabaseProvider } from '../../../src/database/system.provider';
 
 export interface DbTestSetup {
   tempDir: string;
   sysDb: SystemDatabase;
+  restoreProvider: () => void;
 }
 
+export interface UserDbTestSetup {
+  testDatabaseId: string;
+  testDb: UserDatabase;
+}
+
+/**
+ * Connection settings for throwaway test databases only; never use these in production code.
+ * The journal stays in memory rather than being turned off, because the route tests roll back
+ * to a savepoint after every test and that needs a rollback journal.
+ */
+export const TEST_PRAGMAS = [
+  'journal_mode = MEMORY',
+  'synchronous = OFF',
+  'temp_store = MEMORY',
+  'cache_size = -20000',
+];
+
+export function applyTestPragmas(db: UserDatabase | SystemDatabase): void {
+  for (const pragma of TEST_PRAGMAS) {
+    connectionOf(db).pragma(pragma);
+  }
+}
+
+/**
+ * Open a user database (in memory by default) with the test-only pragmas applied.
+ */
+export function createTestUserDatabase(dbPath: string = ':memory:'): UserDatabase {
+  const db = new UserDatabase(dbPath);
+  applyTestPragmas(db);
+  return db;
+}
+
+// Prefer the RAM-backed /dev/shm on Linux so the file-backed test databases never touch a disk.
+// Containers may mount it read-only, so fall back to the OS temp directory unless it is writable.
+function testTempRoot(): string {
+  try {
+    fs.accessSync('/dev/shm', fs.constants.W_OK);
+    return '/dev/shm';
+  } catch {
+    return os.tmpdir();
+  }
+}
+
+const TEST_TEMP_ROOT = testTempRoot();
+
 export function setupTestSystemDatabase(): DbTestSetup {
-  const tempDir = fs.mkdtempSync(path.join(os.tmpdir(), 'test-system-db-'));
+  const tempDir = fs.mkdtempSync(path.join(TEST_TEMP_ROOT, 'test-system-db-'));
   const sysDb = new SystemDatabase(tempDir);
+  // The system database is file-backed, so without these every registry write would fsync
+  applyTestPragmas(sysDb);
 
-  // Assign SYSTEM_DB_PATH so that the SystemDatabaseProvider uses the correct instance of the db.
+  // Hand this instance to the SystemDatabaseProvider so the routers use the same connection as the test.
   // This is only really needed for tests that have code paths using SystemDatabaseProvider (all routers).
-  vi.stubEnv('SYSTEM_DB_PATH', tempDir);
+  // The provider is module state: vitest isolates it per test file, and tests within a file run one at a time
+  // (apart from read-only describe.concurrent blocks), so only one system database is installed at once.
+  const restoreProvider = SystemDatabaseProvider.useInstance(sysDb);
 
-  return { tempDir, sysDb };
+  return { tempDir, sysDb, restoreProvider };
 }
 
 export function teardownTestSystemDatabase(setup: DbTestSetup): void {
+  setup.restoreProvider();
   setup.sysDb.close();
   fs.rmSync(setup.tempDir, { recursive: true, force: true });
 }
+
+// An empty user database with the schema applied, built once per worker and copied into every route test database
+let schemaTemplate: Buffer | undefined;
+
+function getSchemaTemplate(): Buffer {
+  if (!schemaTemplate) {
+    const template = new UserDatabase(':memory:');
+    schemaTemplate = snapshotTestUserDatabase(template);
+    template.close();
+  }
+  return schemaTemplate;
+}
+
+/**
+ * Take a copy of a populated database, to be restored with setupTestUserDatabase.
+ * Copying the file image is much cheaper than replaying the inserts that built it.
+ */
+export function snapshotTestUserDatabase(db: UserDatabase): Buffer {
+  return db['db'].serialize();
+}
+
+/**
+ * Registers a user database and opens it through the provider used by the routes,
+ * so the test and the route handlers share a single connection.
+ * The database starts as a copy of the given snapshot, or of an empty schema template,
+ * so opening it does not have to run the schema DDL.
+ */
+export async function setupTestUserDatabase(sysDb: SystemDatabase, name: string, snapshot?: Buffer): Promise<UserDbTestSetup> {
+  const dbInfo = await sysDb.addUserDatabase(name);
+  fs.writeFileSync(dbInfo.path, snapshot ?? getSchemaTemplate());
+  const testDb = getUserDatabase(dbInfo.id);
+  applyTestPragmas(testDb);
+  return { testDatabaseId: dbInfo.id, testDb };
+}
+
+export async function teardownTestUserDatabase(sysDb: SystemDatabase, testDatabaseId: string): Promise<void> {
+  await UserDatabaseProvider.runFileOperation(testDatabaseId, () => sysDb.deleteUserDatabase(testDatabaseId));
+}
+
+/**
+ * Open a savepoint so that everything written during a test can be undone with rollbackTestTransaction,
+ * which is much cheaper than creating (and running the schema setup for) a new database per test.
+ */
+export function beginTestTransaction(db: UserDatabase | SystemDatabase): void {
+  connectionOf(db).exec('SAVEPOINT test');
+}
+
+export function rollbackTestTransaction(db: UserDatabase | SystemDatabase): void {
+  connectionOf(db).exec('ROLLBACK TO test; RELEASE test');
+}
+
+function connectionOf(db: UserDatabase | SystemDatabase): BetterSqlite3.Database {
+  return db['db'];
+}
+
+export interface TestBlock {
+  content: string;
+  type?: string;
+  position: number;
+  pageId?: string;
+  parentBlockId?: string;
+}
+
+export interface TestWorkspace {
+  name: string;
+  color: string;
+}
+
+/**
+ * Fixture inserts are batched into one transaction so they are committed once rather than once per row.
+ * Inside a test savepoint, better-sqlite3 nests this as a savepoint of its own.
+ */
+function inTestTransaction<T>(db: UserDatabase, insert: () => T): T {
+  return db['db'].transaction(insert)();
+}
+
+export function addTestPages(db: UserDatabase, titles: string[]): string[] {
+  return inTestTransaction(db, () => titles.map(title => db.addPage(title)));
+}
+
+export function addTestBlocks(db: UserDatabase, blocks: TestBlock[]): string[] {
+  return inTestTransaction(db, () => blocks.map(({ content, type = 'text', ...options }) => db.addBlock(content, type, options)));
+}
+
+export function addTestWorkspaces(db: UserDatabase, workspaces: TestWorkspace[]): number[] {
+  return inTestTransaction(db, () => workspaces.map(({ name, color }) => db.addWorkspace(name, color)));
+}
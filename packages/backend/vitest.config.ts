@@ -1,12 +1,24 @@
 import { defineConfig } from 'vitest/config';
 import { resolve } from 'path';
+import { availableParallelism } from 'os';
 
 export default defineConfig({
   test: {
-    include: ['**/*.test.{ts,tsx}'],
+    // Only the tests directory holds tests; a narrow glob keeps discovery from walking src, dist and coverage
+    include: ['tests/**/*.test.ts'],
     environment: 'node',
     setupFiles: ['./tests/setup.ts'],
     globals: true,
+    // Test files run in parallel, each in its own child process. Every file gets its own
+    // system database, provider singletons and temp directories, so nothing is shared between them.
+    // Forks rather than threads because better-sqlite3 is a native addon.
+    pool: 'forks',
+    fileParallelism: true,
+    // Each file gets fresh module state. setupTestSystemDatabase swaps the instance the provider singletons hand
+    // to the routers, which is only safe while no other file can see that state.
+    isolate: true,
+    // On CI, leave two cores for the runner itself instead of vitest's default of all but one
+    maxWorkers: process.env.CI ? Math.max(1, availableParallelism() - 2) : undefined,
     coverage: {
       provider: 'v8',
       reporter: ['text', 'json', 'html'],